@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Tenant, Menu, Reservation
+from .models import CustomUser, Tenant, Menu, Reservation, DailyReservationStat, NotificationOutbox
 
 class MenuInline(admin.TabularInline):
 	model = Menu
@@ -47,6 +47,19 @@ class ReservationAdmin(admin.ModelAdmin):
 	search_fields = ('customer_name', 'tenant__name', 'menu__name')
 	list_filter = ('tenant', 'date')
 
+@admin.register(DailyReservationStat)
+class DailyReservationStatAdmin(admin.ModelAdmin):
+	list_display = ('tenant', 'date', 'reservation_count', 'free_slot_count', 'occupancy_ratio', 'updated_at')
+	list_filter = ('tenant',)
+	readonly_fields = ('updated_at',)
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+	list_display = ('id', 'reservation', 'kind', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+	list_filter = ('status', 'kind')
+	search_fields = ('recipient',)
+	raw_id_fields = ('reservation',)
+
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
 	list_display = ('username', 'email', 'phone', 'role', 'first_name', 'last_name', 'is_staff')
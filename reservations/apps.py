@@ -6,4 +6,5 @@ class ReservationsConfig(AppConfig):
     name = 'reservations'
 
     def ready(self):
+        import reservations.checks
         import reservations.signals
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from django.utils import timezone
+from .models import Reservation
+from .occupancy import get_occupancy, get_reserved_times
+from .schedule import get_schedule
+
+# 期間指定の空き状況APIで一度に取得できる最大日数
+MAX_RANGE_DAYS = 62
+
+# 予約詳細APIと同じ内容を返すために取得する列
+RESERVATION_DETAIL_FIELDS = (
+    'id', 'customer_name', 'customer_email', 'customer_phone',
+    'date', 'time_slot', 'menu__name', 'menu__price', 'created_at',
+)
+
+
+def get_reservations_by_time(tenant, target_date, fields):
+    """指定日の予約を1クエリで取得し、時間枠をキーにした辞書で返す"""
+    fields = ['time_slot'] + [f for f in fields if f != 'time_slot']
+    rows = Reservation.objects.filter(tenant=tenant, date=target_date).values(*fields)
+    return {row['time_slot']: row for row in rows}
+
+def build_day_slots(tenant, target_date, reserved_times, now=None):
+    """予約済み時間枠の集合から1日分のスロット一覧をメモリ上で組み立てる"""
+    if now is None:
+        now = timezone.now()
+    schedule = get_schedule(tenant)
+    available_from = now + timedelta(hours=schedule.advance_hours)
+
+    slots = []
+    for current_time in schedule.slot_datetimes(target_date):
+        is_reserved = current_time.time() in reserved_times
+        # 予約可能時間チェック（現在時刻から指定時間後以降）
+        is_available = timezone.make_aware(current_time) >= available_from
+
+        slots.append({
+            'time': current_time.strftime('%H:%M'),
+            'is_available': is_available and not is_reserved,
+            'is_reserved': is_reserved
+        })
+
+    return slots
+
+def get_day_availability(tenant, target_date, now=None):
+    """指定日のスロット一覧（予約状況付き）を返す（占有ビットマップから判定）"""
+    reserved_times = get_reserved_times(tenant, target_date)
+    return build_day_slots(tenant, target_date, reserved_times, now=now)
+
+def get_reserved_times_by_date(tenant, start_date, end_date):
+    """期間内の予約済み時間枠を1回の範囲クエリで取得し、日付ごとの集合で返す"""
+    reserved = {}
+    rows = Reservation.objects.filter(
+        tenant=tenant, date__range=[start_date, end_date]
+    ).values_list('date', 'time_slot')
+    for reserved_date, time_slot in rows:
+        reserved.setdefault(reserved_date, set()).add(time_slot)
+    return reserved
+
+def get_range_availability(tenant, start_date, end_date, now=None):
+    """期間内の日ごとの空き枠数とスロット一覧を返す"""
+    if now is None:
+        now = timezone.now()
+    schedule = get_schedule(tenant)
+    reserved = get_reserved_times_by_date(tenant, start_date, end_date)
+
+    days = {}
+    current_date = start_date
+    while current_date <= end_date:
+        is_open = schedule.is_open(current_date)
+        if is_open:
+            slots = build_day_slots(tenant, current_date, reserved.get(current_date, ()), now=now)
+        else:
+            slots = []
+        days[current_date.strftime('%Y-%m-%d')] = {
+            'is_open': is_open,
+            'free_count': sum(1 for slot in slots if slot['is_available']),
+            'slots': slots,
+        }
+        current_date += timedelta(days=1)
+
+    return days
+
+def reservation_detail_payload(row):
+    """values()で取得した予約1件を予約詳細APIの形式に変換"""
+    return {
+        'id': row['id'],
+        'customer_name': row['customer_name'],
+        'customer_email': row['customer_email'],
+        'customer_phone': row['customer_phone'],
+        'date': row['date'].strftime('%Y-%m-%d'),
+        'time_slot': row['time_slot'].strftime('%H:%M'),
+        'menu_name': row['menu__name'] or '未設定',
+        'menu_price': row['menu__price'] if row['menu__name'] is not None else 0,
+        'created_at': row['created_at'].strftime('%Y-%m-%d %H:%M')
+    }
+
+def build_owner_day_slots(tenant, target_date, reservations, include_detail=False):
+    """時間枠をキーにした予約辞書からオーナー向けスロット一覧を組み立てる"""
+    slots = []
+    for current_time in get_schedule(tenant).slot_datetimes(target_date):
+        row = reservations.get(current_time.time())
+
+        slot = {
+            'time': current_time.strftime('%H:%M'),
+            'is_available': row is None,
+            'is_reserved': row is not None,
+            'reservation_id': row['id'] if row else None,
+            'customer_name': row['customer_name'] if row else None,
+            'menu_name': row['menu__name'] if row else None,
+        }
+        if include_detail:
+            slot['detail'] = reservation_detail_payload(row) if row else None
+        slots.append(slot)
+
+    return slots
+
+def get_owner_day_slots(tenant, target_date, include_detail=False):
+    """オーナー向けの指定日スロット一覧（予約情報付き）を1クエリで返す"""
+    if include_detail:
+        fields = RESERVATION_DETAIL_FIELDS
+    else:
+        fields = ('id', 'customer_name', 'menu__name')
+    # 占有ビットマップが空なら予約の取得自体を省略する
+    if get_occupancy(tenant, target_date):
+        reservations = get_reservations_by_time(tenant, target_date, fields)
+    else:
+        reservations = {}
+    return build_owner_day_slots(tenant, target_date, reservations, include_detail=include_detail)
@@ -0,0 +1,87 @@
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from .booking import bulk_changes, record_bulk_changes
+from .models import Reservation
+from .schedule import get_schedule
+
+# ブロック枠として登録する予約の顧客名
+BLOCKED_NAME = 'BLOCKED'
+# 1回のリクエストで指定できる最大日数
+MAX_BLOCK_DAYS = 92
+
+
+def block_targets(tenant, start_date, end_date, start_time=None, end_time=None, weekdays=None):
+    """期間・時間帯・曜日から対象の (日付, 時間枠) を返す（休業日は含めない）
+
+    時間帯は start_time 以上 end_time 未満、weekdays は月曜=0 の曜日番号の集合。
+    """
+    schedule = get_schedule(tenant)
+    slots = [
+        slot for slot in schedule.slots
+        if (start_time is None or slot >= start_time) and (end_time is None or slot < end_time)
+    ]
+    targets = []
+    day = start_date
+    while day <= end_date:
+        if schedule.is_open(day) and (weekdays is None or day.weekday() in weekdays):
+            targets.extend((day, slot) for slot in slots)
+        day += timedelta(days=1)
+    return targets
+
+def _existing_slots(tenant, targets):
+    """対象範囲の予約済み (日付, 時間枠) を1クエリで返す"""
+    return set(
+        Reservation.objects.filter(
+            tenant=tenant,
+            date__range=(targets[0][0], targets[-1][0]),
+            time_slot__in={slot for _, slot in targets},
+        ).values_list('date', 'time_slot')
+    )
+
+def block_slots(tenant, targets):
+    """対象の空き枠をまとめてブロックし、(ブロックした数, 予約済みで飛ばした数) を返す"""
+    if not targets:
+        return 0, 0
+    for attempt in range(2):
+        existing = _existing_slots(tenant, targets)
+        blocks = [
+            Reservation(tenant=tenant, date=day, time_slot=slot, customer_name=BLOCKED_NAME)
+            for day, slot in targets if (day, slot) not in existing
+        ]
+        try:
+            with transaction.atomic():
+                # シグナルは呼ばれないため派生データは明示的に更新する
+                Reservation.objects.bulk_create(blocks)
+                record_bulk_changes(tenant, Counter(block.date for block in blocks))
+        except IntegrityError:
+            # 確認後に同じ枠へ予約が入った場合はもう一度確認する
+            continue
+        return len(blocks), len(targets) - len(blocks)
+    raise IntegrityError('予約が集中しているため、ブロックできませんでした')
+
+def unblock_slots(tenant, targets):
+    """対象のブロック枠をまとめて解除し、解除した数を返す（通常の予約は残す）"""
+    if not targets:
+        return 0
+    wanted = set(targets)
+    blocked = [
+        (reservation_id, day)
+        for reservation_id, day, slot in Reservation.objects.filter(
+            tenant=tenant,
+            customer_name=BLOCKED_NAME,
+            date__range=(targets[0][0], targets[-1][0]),
+            time_slot__in={slot for _, slot in targets},
+        ).values_list('id', 'date', 'time_slot')
+        if (day, slot) in wanted
+    ]
+    if not blocked:
+        return 0
+    ids = [reservation_id for reservation_id, _ in blocked]
+    with transaction.atomic():
+        # 関連する行は通常の削除と同じく連鎖削除し、派生データは日付ごとにまとめて更新する
+        with bulk_changes():
+            Reservation.objects.filter(id__in=ids).delete()
+        removed = Counter(day for _, day in blocked)
+        record_bulk_changes(tenant, {day: -count for day, count in removed.items()})
+    return len(ids)
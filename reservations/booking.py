@@ -0,0 +1,77 @@
+import threading
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from .models import Reservation
+from .occupancy import schedule_occupancy_invalidation
+from .stats import schedule_stat_update
+from .versioning import schedule_version_bump
+
+SLOT_TAKEN_MESSAGE = 'この時間は既に予約済みです'
+
+_bulk_state = threading.local()
+
+
+class SlotTaken(Exception):
+    """指定の時間枠が既に埋まっている"""
+
+    def __init__(self, message=SLOT_TAKEN_MESSAGE):
+        super().__init__(message)
+        self.message = message
+
+
+def book_slot(tenant, date, time_slot, on_booked=None, **fields):
+    """時間枠を予約する（埋まっていればSlotTaken）
+
+    事前の exists() は行わず、セーブポイント内でINSERTして一意制約違反を
+    「予約済み」として扱う。同時に同じ枠を予約しても1件だけが成功する。
+    tenant と fields の menu は呼び出し側で読み込み済みのものを渡すこと
+    （Reservation.save(trusted=True) で再取得・重複確認のSELECTを省く）。
+    on_booked(reservation) は同じセーブポイント内で呼ばれる（通知キューへの登録など）。
+    一意制約以外の IntegrityError（通知キューの登録失敗や、コミット時に検査される
+    外部キーの違反など）は「予約済み」にせずそのまま送出する。
+    """
+    reservation = Reservation(tenant=tenant, date=date, time_slot=time_slot, **fields)
+    try:
+        with transaction.atomic():
+            reservation.save(trusted=True)
+            if on_booked is not None:
+                on_booked(reservation)
+    except IntegrityError:
+        # セーブポイントは巻き戻っているため、枠が埋まっていれば他の予約によるもの
+        if Reservation.objects.filter(tenant=tenant, date=date, time_slot=time_slot).exists():
+            raise SlotTaken()
+        raise
+    return reservation
+
+@contextmanager
+def bulk_changes():
+    """ブロック内では予約の保存・削除ごとの派生データ更新（シグナル）を止める
+
+    QuerySet.delete() などで多数の予約をまとめて書き込む場合に使い、
+    派生データは record_bulk_changes() で日付ごとにまとめて更新する。
+    """
+    previous = in_bulk_changes()
+    _bulk_state.active = True
+    try:
+        yield
+    finally:
+        _bulk_state.active = previous
+
+def in_bulk_changes():
+    """bulk_changes() のブロック内かどうか"""
+    return getattr(_bulk_state, 'active', False)
+
+def record_bulk_changes(tenant, deltas):
+    """bulk_create・一括削除の後に派生データを更新する
+
+    一括操作では post_save / post_delete が呼ばれないため、占有ビットマップ・
+    日別集計・テナントのバージョンをここでまとめて更新する。
+    deltas は {日付: 予約件数の増減}。
+    """
+    deltas = {day: delta for day, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    schedule_occupancy_invalidation(tenant, deltas)
+    for day in deltas:
+        schedule_stat_update(tenant, day)
+    schedule_version_bump(tenant.slug)
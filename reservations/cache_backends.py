@@ -0,0 +1,132 @@
+import threading
+import time
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient, RedisSerializer
+
+
+class LocalRedis:
+    """DjangoのRedisCacheが使うコマンドだけをメモリ上で実装したRedisクライアント
+
+    同じ LOCATION を指すクライアントは同じデータを共有し、SET NX・INCR は
+    ロックの中で行うため、Redisと同じく複数スレッドから見て不可分になる。
+    """
+    _databases = {}
+    _databases_lock = threading.Lock()
+
+    def __init__(self, location):
+        with self._databases_lock:
+            self._data, self._lock = self._databases.setdefault(location, ({}, threading.RLock()))
+
+    def _encode(self, value):
+        # Redisと同じく整数は文字列として保存する
+        if isinstance(value, int):
+            return str(value).encode('ascii')
+        return value
+
+    def _alive(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            return None if entry is None else entry[0]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            self._data[key] = (self._encode(value), None if ex is None else time.monotonic() + ex)
+            return True
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping):
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (self._encode(value), None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        with self._lock:
+            return int(self._alive(key) is not None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            entry = self._alive(key)
+            value, expires_at = entry if entry is not None else (b'0', None)
+            value = int(value) + amount
+            self._data[key] = (self._encode(value), expires_at)
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            entry = self._alive(key)
+            if entry is None:
+                return False
+            self._data[key] = (entry[0], time.monotonic() + seconds)
+            return True
+
+    def persist(self, key):
+        with self._lock:
+            entry = self._alive(key)
+            if entry is None or entry[1] is None:
+                return False
+            self._data[key] = (entry[0], None)
+            return True
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def pipeline(self):
+        return LocalRedisPipeline(self)
+
+class LocalRedisPipeline:
+    """コマンドをためて execute() でまとめて実行する"""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+        return lambda *args, **kwargs: self._commands.append((command, args, kwargs))
+
+    def execute(self):
+        with self._client._lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+class LocalRedisCacheClient(RedisCacheClient):
+    """redisパッケージを使わず LocalRedis に接続する RedisCacheClient"""
+
+    def __init__(self, servers, serializer=None, **options):
+        self._servers = servers
+        self._serializer = serializer or RedisSerializer()
+
+    def get_client(self, key=None, *, write=False):
+        return LocalRedis(self._servers[0])
+
+class LocalRedisCache(RedisCache):
+    """RedisCache の動作をRedisサーバーなしで確認するためのキャッシュバックエンド
+
+    シリアライズやキーの扱いは RedisCache のものをそのまま使い、通信先だけを
+    プロセス内の LocalRedis に置き換える（開発環境・テスト用）。
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = LocalRedisCacheClient
@@ -0,0 +1,104 @@
+import logging
+import time
+from dataclasses import dataclass
+from django.core.cache import caches
+from .versioning import get_directory_version, get_tenant_version
+
+logger = logging.getLogger(__name__)
+
+# 再計算中の印の保持期間（秒）。計算したプロセスが落ちてもこの時間で解放される
+COMPUTE_LOCK_TIMEOUT = 10
+# 他のリクエストの再計算を待つ最大秒数と確認の間隔
+COMPUTE_WAIT_TIMEOUT = 2.0
+COMPUTE_POLL_INTERVAL = 0.02
+
+# キャッシュにない値（None・0 も値としてキャッシュできるようにする）
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CacheNamespace:
+    """用途ごとのキャッシュ（キーの接頭辞・保持秒数・使うキャッシュの別名）
+
+    キーは "reservations:<name>:..." の形にそろえる。テナントのデータに
+    依存する値は tenant_key() を使い、テナントのバージョンが進めば
+    古い値を削除しなくても参照されなくなる。
+    """
+    name: str
+    timeout: int
+    alias: str = 'default'
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, *parts):
+        """バージョンを含まないキー"""
+        return ':'.join(['reservations', self.name, *(str(part) for part in parts)])
+
+    def tenant_key(self, tenant_slug, *parts):
+        """テナントのバージョンを含むキー"""
+        return self.key(tenant_slug, f'v{get_tenant_version(tenant_slug)}', *parts)
+
+    def directory_key(self, *parts):
+        """テナント一覧のバージョンを含むキー"""
+        return self.key(f'v{get_directory_version()}', *parts)
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, self.timeout if timeout is None else timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many(keys)
+
+    def get_or_compute(self, key, compute, timeout=None):
+        """キャッシュになければ compute() の結果を保存して返す
+
+        結果は cache.add() で保存するため、計算中に set() で書き込まれた新しい値
+        （コミット後の作り直しなど）を古い計算結果で上書きしない。
+        同じキーへの同時アクセスでは、cache.add() で印を付けた1リクエストだけが
+        計算し、他はその結果が保存されるのを待つ（待ちきれなければ自分で計算する）。
+        add() が不可分なのは同じキャッシュを共有する範囲（locmemならプロセス内、
+        Redisならサーバー全体）に限られる。
+        """
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{key}:computing'
+        if self.cache.add(lock_key, 1, COMPUTE_LOCK_TIMEOUT):
+            try:
+                value = self._fill(key, compute(), timeout)
+            finally:
+                self.cache.delete(lock_key)
+            return value
+
+        deadline = time.monotonic() + COMPUTE_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(COMPUTE_POLL_INTERVAL)
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if not self.cache.has_key(lock_key):
+                # 計算したリクエストが失敗した場合は待たずに自分で計算する
+                break
+        logger.info(f"キャッシュの再計算を待てなかったため計算します: {key}")
+        return self._fill(key, compute(), timeout)
+
+    def _fill(self, key, value, timeout):
+        # 計算中に別の値が書き込まれていれば、そちらを正とする
+        if self.cache.add(key, value, self.timeout if timeout is None else timeout):
+            return value
+        return self.cache.get(key, value)
+
+
+# 占有ビットマップ（予約の書き込み時に作り直すため長めでよい）
+OCCUPANCY = CacheNamespace('occupancy', timeout=60 * 60 * 24)
+# 匿名向けのページ（テナントのバージョンが変われば別のキーになる）
+PAGES = CacheNamespace('page', timeout=600)
+# 開発者画面の集計（予約件数は多少遅れて反映されてもよい）
+DASHBOARD = CacheNamespace('developer-dashboard', timeout=60)
+# ログイン画面の店舗検索の結果
+DIRECTORY = CacheNamespace('tenant-directory', timeout=300)
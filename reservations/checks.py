@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# プロセスごとにデータを持つキャッシュ（ワーカー間で共有されない）
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'reservations.cache_backends.LocalRedisCache',
+)
+# add()・incr() が不可分でないキャッシュ（同時の再計算防止・バージョン更新が競合する）
+NON_ATOMIC_BACKENDS = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+def _backend(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND', '')
+
+@register('caches')
+def check_occupancy_cache(app_configs, **kwargs):
+    """本番（DEBUG=False）で占有ビットマップがプロセス内のキャッシュに置かれていないか
+
+    予約を受けたワーカーはコミット後に自分のキャッシュのビットマップだけを作り直すため、
+    他のワーカーは最大 OCCUPANCY.timeout の間、予約済みの枠を空きとして返してしまう。
+    """
+    from .caching import OCCUPANCY
+    if settings.DEBUG or _backend(OCCUPANCY.alias) not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [Warning(
+        f"占有ビットマップのキャッシュ（{OCCUPANCY.alias}）がワーカー間で共有されません",
+        hint="CACHE_URL に redis:// を指定し、全ワーカーで同じキャッシュを使ってください。",
+        id='reservations.W001',
+    )]
+
+@register('caches')
+def check_shared_cache(app_configs, **kwargs):
+    """本番（DEBUG=False）で default キャッシュがワーカー間で共有・不可分更新できるか
+
+    テナントのバージョン（ETag・ページキャッシュ・TenantCacheの無効化）と
+    CacheNamespace の値は default キャッシュに置くため、ワーカーごとに別の
+    キャッシュだと、あるワーカーでの更新が他のワーカーに伝わらない。
+    """
+    if settings.DEBUG:
+        return []
+    backend = _backend('default')
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return [Warning(
+            "default キャッシュがワーカー間で共有されないため、テナントのバージョンの更新が他のワーカーに伝わりません",
+            hint="CACHE_URL に redis:// を指定してください。",
+            id='reservations.W002',
+        )]
+    if backend in NON_ATOMIC_BACKENDS:
+        return [Warning(
+            "ファイルキャッシュの add()・incr() は不可分でないため、同時の再計算防止とバージョンの更新が競合します",
+            hint="複数のワーカーで動かす場合は CACHE_URL に redis:// を指定してください。",
+            id='reservations.W003',
+        )]
+    return []
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .caching import DASHBOARD
+from .models import DailyReservationStat, Reservation, Tenant
+
+# 1ページのテナント数
+DASHBOARD_PAGE_SIZE = 50
+
+
+def _stat_total(today=None):
+    """テナントごとの予約件数を日別集計から合計するサブクエリ（today以降に絞れる）"""
+    stats = DailyReservationStat.objects.filter(tenant=OuterRef('pk'))
+    if today is not None:
+        stats = stats.filter(date__gte=today)
+    total = stats.order_by().values('tenant').annotate(total=Sum('reservation_count')).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+def tenant_summaries(today):
+    """オーナーと予約件数・今後の予約件数・最終予約日時を付けたテナント一覧
+
+    件数は日別集計、最終予約日時は (tenant, created_at) のインデックスを引く
+    相関サブクエリで求めるため、取得したページの行だけが集計される。
+    """
+    last_booked = (
+        Reservation.objects.filter(tenant=OuterRef('pk'))
+        .order_by('-created_at')
+        .values('created_at')[:1]
+    )
+    return (
+        Tenant.objects.select_related('owner')
+        .annotate(
+            reservation_count=_stat_total(),
+            upcoming_count=_stat_total(today),
+            last_booked_at=Subquery(last_booked),
+        )
+        .order_by('name', 'id')
+    )
+
+def estimated_reservation_count():
+    """全テナントの予約件数（予約テーブルのCOUNT(*)ではなく日別集計の合計）"""
+    return DailyReservationStat.objects.aggregate(total=Sum('reservation_count'))['total'] or 0
+
+def _page_number(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def get_dashboard_page(page_number, page_size=DASHBOARD_PAGE_SIZE):
+    """開発者画面の1ページ分（テナント一覧と全体の件数）をキャッシュ付きで返す"""
+    page_number = _page_number(page_number)
+    today = timezone.localdate()
+    key = DASHBOARD.key(f'{today:%Y%m%d}', page_size, page_number)
+    data = DASHBOARD.get(key)
+    if data is None:
+        page = Paginator(tenant_summaries(today), page_size).get_page(page_number)
+        data = {
+            'tenants': list(page.object_list),
+            'page_number': page.number,
+            'num_pages': page.paginator.num_pages,
+            'has_previous': page.has_previous(),
+            'has_next': page.has_next(),
+            'tenant_count': page.paginator.count,
+            'user_count': get_user_model().objects.count(),
+            'total_reservations': estimated_reservation_count(),
+        }
+        DASHBOARD.set(key, data)
+    return data
@@ -1,9 +1,14 @@
 from functools import wraps
-from django.http import HttpResponseForbidden
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotModified
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from .models import Tenant
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from .tenants import resolve_tenant
+from .caching import PAGES
+from .versioning import get_release, make_tenant_etag
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,13 +73,14 @@ def tenant_owner_required(view_func):
         )
         
         if is_developer:
-            # 開発者は全てのテナントにアクセス可能
+            # 開発者は全てのテナントにアクセス可能（存在しない場合は404）
             logger.info(f"Developer access to tenant {tenant_slug} by user {request.user.id}")
+            resolve_tenant(request, tenant_slug)
             return view_func(request, tenant_slug, *args, **kwargs)
         
-        # テナントの存在確認
+        # テナントの存在確認（1リクエスト1回だけ取得し request.tenant に付与）
         try:
-            tenant = get_object_or_404(Tenant, slug=tenant_slug)
+            tenant = resolve_tenant(request, tenant_slug)
         except Exception as e:
             logger.error(f"Tenant not found: {tenant_slug}, error: {str(e)}")
             return render(request, 'reservations/access_denied.html', {
@@ -85,7 +91,7 @@ def tenant_owner_required(view_func):
         is_owner = (
             hasattr(request.user, 'role') and 
             request.user.role == 'owner' and 
-            tenant.owner == request.user
+            tenant.owner_id == request.user.id
         )
         
         if not is_owner:
@@ -119,9 +125,8 @@ def safe_tenant_access(view_func):
     @wraps(view_func)
     def wrapper(request, tenant_slug, *args, **kwargs):
         try:
-            tenant = get_object_or_404(Tenant, slug=tenant_slug)
             # テナントオブジェクトをrequestに追加
-            request.tenant = tenant
+            resolve_tenant(request, tenant_slug)
             return view_func(request, tenant_slug, *args, **kwargs)
         except Exception as e:
             logger.error(f"Error accessing tenant {tenant_slug}: {str(e)}")
@@ -129,3 +134,67 @@ def safe_tenant_access(view_func):
                 'message': 'テナントにアクセスできません。'
             })
     return wrapper
+
+def tenant_etag(endpoint, time_sensitive=False, private=False):
+    """テナントのバージョンからETagを付与し、If-None-Matchが一致すればORMを使わず304を返す"""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, tenant_slug, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, tenant_slug, *args, **kwargs)
+            
+            params = dict(request.GET.items())
+            params.update({f"kwarg:{key}": value for key, value in kwargs.items()})
+            etag = make_tenant_etag(endpoint, tenant_slug, params, time_sensitive=time_sensitive)
+            
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match:
+                etags = parse_etags(if_none_match)
+                if etag in etags or '*' in etags:
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
+            
+            response = view_func(request, tenant_slug, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                # 毎回再検証させ、変更がなければ304で済ませる
+                if private:
+                    patch_cache_control(response, no_cache=True, private=True)
+                else:
+                    patch_cache_control(response, no_cache=True, public=True)
+            return response
+        return wrapper
+    return decorator
+
+def tenant_page_cache(endpoint):
+    """セッションCookieのない匿名GETに、テナント単位でキャッシュしたページを返す
+
+    キャッシュにあればセッション・ORM・テンプレートを使わずに応答する。
+    ページにはユーザーごとの値（CSRFトークンなど）を含めないこと。
+    キーにはリリースを含め、テンプレートや静的ファイルが変わったデプロイの後は
+    古いページを返さない。
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, tenant_slug, *args, **kwargs):
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.GET
+                or settings.SESSION_COOKIE_NAME in request.COOKIES
+            ):
+                return view_func(request, tenant_slug, *args, **kwargs)
+
+            key = PAGES.tenant_key(tenant_slug, endpoint, get_release())
+            cached = PAGES.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, tenant_slug, *args, **kwargs)
+            # Cookieを設定する応答は他の利用者に配らない
+            if response.status_code == 200 and not response.cookies and not response.streaming:
+                PAGES.set(key, (response.content, response['Content-Type']))
+            return response
+        return wrapper
+    return decorator
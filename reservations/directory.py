@@ -0,0 +1,53 @@
+import hashlib
+from django.core.paginator import Paginator
+from .caching import DIRECTORY
+from .models import Tenant
+
+# ログイン画面の店舗一覧の1ページの件数
+DIRECTORY_PAGE_SIZE = 30
+# 前方一致検索の件数（既定値と上限）
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+
+def listed_tenants():
+    """一覧に載せるテナント（予約ページのURLがあるもの）"""
+    return Tenant.objects.exclude(slug__isnull=True).exclude(slug='').order_by('name_lower', 'id')
+
+def parse_page_number(value):
+    """ページ番号（不正なら1）"""
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+def directory_num_pages(page_size=DIRECTORY_PAGE_SIZE):
+    """店舗一覧のページ数（テナント一覧のバージョンごとにキャッシュする）
+
+    ページ番号をこの値までに丸めてからキャッシュのキーに使い、存在しないページ番号で
+    同じ内容のキャッシュが増えないようにする。
+    """
+    key = DIRECTORY.directory_key('num-pages', page_size)
+    return DIRECTORY.get_or_compute(key, lambda: Paginator(listed_tenants(), page_size).num_pages)
+
+def directory_page(page_number, page_size=DIRECTORY_PAGE_SIZE):
+    """店舗一覧の1ページ（店舗名とslugだけを読み込む）"""
+    queryset = listed_tenants().only('name', 'slug')
+    return Paginator(queryset, page_size).get_page(page_number)
+
+def search_tenants(query, limit=SEARCH_LIMIT):
+    """店舗名の前方一致検索（大文字・小文字を区別しない）
+
+    name_lower のインデックスを LIKE 'query%' で引くため、件数が増えても
+    先頭の limit 件を読むだけで済む。結果はテナント一覧のバージョンごとにキャッシュする。
+    """
+    prefix = query.strip().lower()[:100]
+    if not prefix:
+        return []
+    digest = hashlib.sha1(prefix.encode('utf-8')).hexdigest()
+    key = DIRECTORY.directory_key('search', limit, digest)
+    results = DIRECTORY.get(key)
+    if results is None:
+        results = list(listed_tenants().filter(name_lower__startswith=prefix).values('name', 'slug')[:limit])
+        DIRECTORY.set(key, results)
+    return results
@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from datetime import datetime
+from string import Formatter
+from django.core.exceptions import ValidationError
+import threading
+
+# テンプレートで使える差し込み項目
+PLACEHOLDERS = ('店舗名', 'お客様名', '予約日時', '電話番号', 'メールアドレス')
+
+# テンプレートのフィールド名と画面上の項目名
+TEMPLATE_FIELDS = (
+    ('customer_email_subject', '予約確認メール件名'),
+    ('customer_email_message', '予約確認メール本文'),
+    ('owner_email_subject', '予約通知メール件名'),
+    ('owner_email_message', '予約通知メール本文'),
+)
+
+# テナントID → コンパイル済みテンプレート（プロセス内メモ化）
+_templates = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """固定文字列と差し込み項目に分解済みのテンプレート
+
+    parts は文字列と差し込み項目名の交互の並び（奇数番目が項目名）。
+    """
+    parts: tuple
+
+    def render(self, values):
+        """差し込み項目を埋めて文字列を返す"""
+        parts = list(self.parts)
+        parts[1::2] = [values[name] for name in self.parts[1::2]]
+        return ''.join(parts)
+
+
+@dataclass(frozen=True)
+class TenantEmailTemplates:
+    """テナントのメールテンプレート一式"""
+    tenant_id: int
+    updated_at: datetime
+    customer_email_subject: CompiledTemplate
+    customer_email_message: CompiledTemplate
+    owner_email_subject: CompiledTemplate
+    owner_email_message: CompiledTemplate
+
+def compile_template(text, label='テンプレート'):
+    """テンプレート文字列を解析する（不正な差し込み項目はValidationError）"""
+    parts = ['']
+    try:
+        parsed = list(Formatter().parse(text))
+    except ValueError:
+        raise ValidationError(f'{label}の {{ }} の対応が正しくありません。文字として使う場合は {{{{ }}}} と書いてください。')
+
+    for literal, name, format_spec, conversion in parsed:
+        parts[-1] += literal
+        if name is None:
+            continue
+        if name not in PLACEHOLDERS:
+            raise ValidationError(
+                f'{label}に使えない差し込み項目 {{{name}}} があります。'
+                f'使える項目: {"、".join("{" + p + "}" for p in PLACEHOLDERS)}'
+            )
+        if format_spec or conversion:
+            raise ValidationError(f'{label}の差し込み項目 {{{name}}} に書式指定は使えません。')
+        parts.extend([name, ''])
+    return CompiledTemplate(parts=tuple(parts))
+
+def compile_email_templates(tenant):
+    """Tenantの4つのテンプレートをまとめて解析する"""
+    compiled = {field: compile_template(getattr(tenant, field), label) for field, label in TEMPLATE_FIELDS}
+    return TenantEmailTemplates(tenant_id=tenant.pk, updated_at=tenant.updated_at, **compiled)
+
+def validate_email_templates(tenant):
+    """保存前のテンプレート検証（不正ならValidationError）"""
+    compile_email_templates(tenant)
+
+def get_email_templates(tenant):
+    """テナントのテンプレートを返す（テナントIDと更新日時でメモ化）"""
+    if tenant.pk is None:
+        return compile_email_templates(tenant)
+
+    templates = _templates.get(tenant.pk)
+    if templates is not None and templates.updated_at == tenant.updated_at:
+        return templates
+
+    templates = compile_email_templates(tenant)
+    with _lock:
+        _templates[tenant.pk] = templates
+    return templates
+
+# 前日リマインドメール（全テナント共通）
+REMINDER_SUBJECT = compile_template('【{店舗名}】明日のご予約のお知らせ')
+REMINDER_MESSAGE = compile_template(
+    '{お客様名} 様\n\n'
+    '明日のご予約についてお知らせいたします。\n\n'
+    '■ ご予約日時: {予約日時}\n'
+    '■ 店舗: {店舗名}\n\n'
+    'ご来店をお待ちしております。\n'
+    '変更・キャンセルの際は店舗までご連絡ください。\n'
+)
+REMINDER_SMS = compile_template('【{店舗名}】明日のご予約のお知らせ\n日時: {予約日時}\nお名前: {お客様名}')
+
+def template_values(reservation, empty_email=''):
+    """予約から差し込み項目の値を作る"""
+    return {
+        '店舗名': reservation.tenant.name,
+        'お客様名': reservation.customer_name,
+        '予約日時': f"{reservation.date} {reservation.time_slot}",
+        '電話番号': reservation.customer_phone,
+        'メールアドレス': reservation.customer_email or empty_email,
+    }
@@ -0,0 +1,65 @@
+import csv
+from django.utils import timezone
+from .blocking import BLOCKED_NAME
+from .pagination import filter_reservations
+
+# 出力する列（取り込みと同じ列名にして、編集したファイルをそのまま取り込めるようにする）
+EXPORT_COLUMNS = (
+    ('date', 'date'),
+    ('time_slot', 'time_slot'),
+    ('customer_name', 'customer_name'),
+    ('customer_phone', 'customer_phone'),
+    ('customer_email', 'customer_email'),
+    ('menu', 'menu__name'),
+    ('created_at', 'created_at'),
+)
+# DBから読み込む単位
+EXPORT_CHUNK_SIZE = 2000
+# 表計算ソフトが数式として扱う先頭文字（該当するセルは先頭に ' を付けて文字列にする）
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """csv.writer の書き込み先（書いた行をそのまま返す）"""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(tenant, start_date=None, end_date=None, menu_id=None, include_blocked=False):
+    """出力対象の予約（メニュー名を結合した値のタプル）"""
+    queryset = filter_reservations(tenant, start_date=start_date, end_date=end_date, menu_id=menu_id)
+    if not include_blocked:
+        queryset = queryset.exclude(customer_name=BLOCKED_NAME)
+    return queryset.order_by('date', 'time_slot').values_list(*(field for _, field in EXPORT_COLUMNS))
+
+def escape_cell(value):
+    """数式として解釈される値の先頭に ' を付ける（CSVインジェクション対策）"""
+    if value and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def unescape_cell(value):
+    """escape_cell() で付けた ' を取り除く（出力したファイルを取り込むとき用）"""
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+def _format_row(row):
+    date, time_slot, customer_name, customer_phone, customer_email, menu_name, created_at = row
+    return (
+        date.isoformat(),
+        time_slot.strftime('%H:%M'),
+        escape_cell(customer_name),
+        escape_cell(customer_phone),
+        escape_cell(customer_email or ''),
+        escape_cell(menu_name or ''),
+        timezone.localtime(created_at).strftime('%Y-%m-%d %H:%M:%S') if created_at else '',
+    )
+
+def iter_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """CSVを1行ずつ返す（Excelで文字化けしないよう先頭にBOMを付ける）"""
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in queryset.iterator(chunk_size=chunk_size):
+        yield writer.writerow(_format_row(row))
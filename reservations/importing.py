@@ -0,0 +1,206 @@
+import csv
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from .booking import SLOT_TAKEN_MESSAGE, record_bulk_changes
+from .exporting import unescape_cell
+from .models import Menu, Reservation
+from .schedule import get_schedule
+
+# 対応するファイル形式
+IMPORT_FORMATS = ('csv', 'jsonl')
+# 重複確認とbulk_createをまとめて行う件数
+IMPORT_CHUNK_SIZE = 500
+# 結果に含めるエラー行の上限（件数は全件数える）
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportResult:
+    """取り込み結果（登録件数と行ごとのエラー）"""
+    created: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'message': message})
+
+    def as_dict(self):
+        # 重複エラーはまとめて確認するため行番号順に並べ直す
+        errors = sorted(self.errors, key=lambda error: error['line'])
+        return {'created': self.created, 'error_count': self.error_count, 'errors': errors}
+
+def guess_format(filename):
+    """ファイル名の拡張子から形式を推定する（不明ならNone）"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+def read_rows(stream, fmt):
+    """テキストストリームから1行ずつ (行番号, 行データ, エラー) を返す"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, 'JSONとして読み取れません'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, '1行に1つのオブジェクトを記述してください'
+            continue
+        yield line_number, row, None
+
+def _text(row, key):
+    value = row.get(key)
+    # 出力時に数式対策で付けた ' は取り除く
+    return '' if value is None else unescape_cell(str(value).strip())
+
+def _parse_time(value):
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            pass
+    return None
+
+def build_reservation(tenant, schedule, menus, row):
+    """1行分の予約を組み立てる（不正な行はValidationError）"""
+    date_str = _text(row, 'date')
+    time_str = _text(row, 'time_slot')
+    customer_name = _text(row, 'customer_name')
+    customer_phone = _text(row, 'customer_phone')
+    customer_email = _text(row, 'customer_email')
+    menu_name = _text(row, 'menu')
+
+    if not all([date_str, time_str, customer_name]):
+        raise ValidationError('date・time_slot・customer_name は必須です')
+    try:
+        reserve_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError('日付の形式が正しくありません（YYYY-MM-DD）')
+    reserve_time = _parse_time(time_str)
+    if reserve_time is None:
+        raise ValidationError('時間の形式が正しくありません（HH:MM）')
+
+    if not schedule.is_open(reserve_date):
+        raise ValidationError('営業日ではありません')
+    if schedule.slot_index(reserve_time) is None:
+        raise ValidationError('営業時間の時間枠ではありません')
+    if len(customer_name) > 100:
+        raise ValidationError('顧客名は100文字以内で入力してください')
+    if len(customer_phone) > 20:
+        raise ValidationError('電話番号は20文字以内で入力してください')
+    if customer_email:
+        validate_email(customer_email)
+
+    menu = None
+    if menu_name:
+        menu = menus.get(menu_name)
+        if menu is None:
+            raise ValidationError(f'メニュー「{menu_name}」が見つかりません')
+
+    return Reservation(
+        tenant=tenant,
+        menu=menu,
+        customer_name=customer_name,
+        customer_phone=customer_phone,
+        customer_email=customer_email or None,
+        date=reserve_date,
+        time_slot=reserve_time,
+    )
+
+def _import_chunk(tenant, chunk, result):
+    """既存予約との重複を1クエリで確認し、残りをbulk_createする
+
+    確認後に同じ枠へ予約が入ってbulk_createが失敗した場合は、残りを1件ずつ
+    保存し直し、実際に重複した行だけをエラーにする。
+    """
+    existing = set(
+        Reservation.objects.filter(
+            tenant=tenant,
+            date__in={reservation.date for _, reservation in chunk},
+            time_slot__in={reservation.time_slot for _, reservation in chunk},
+        ).values_list('date', 'time_slot')
+    )
+    pending = []
+    for line, reservation in chunk:
+        if (reservation.date, reservation.time_slot) in existing:
+            result.add_error(line, SLOT_TAKEN_MESSAGE)
+        else:
+            pending.append((line, reservation))
+    try:
+        with transaction.atomic():
+            # シグナル（通知メール・派生データ更新）は呼ばれないため派生データは明示的に更新する
+            Reservation.objects.bulk_create([reservation for _, reservation in pending])
+            record_bulk_changes(tenant, Counter(reservation.date for _, reservation in pending))
+    except IntegrityError:
+        _import_each(tenant, pending, result)
+        return
+    result.created += len(pending)
+
+def _import_each(tenant, pending, result):
+    """1件ずつ保存する（重複した行だけをエラーにし、それ以外のIntegrityErrorは送出する）"""
+    created = Counter()
+    for line, reservation in pending:
+        try:
+            with transaction.atomic():
+                Reservation.objects.bulk_create([reservation])
+        except IntegrityError:
+            if not Reservation.objects.filter(
+                tenant=tenant, date=reservation.date, time_slot=reservation.time_slot,
+            ).exists():
+                raise
+            result.add_error(line, SLOT_TAKEN_MESSAGE)
+            continue
+        created[reservation.date] += 1
+    record_bulk_changes(tenant, created)
+    result.created += sum(created.values())
+
+def import_reservations(tenant, rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """予約を一括で取り込む（通知は送らない）
+
+    rows は read_rows() の戻り値。検証はテナントのスケジュールと読み込み済みの
+    メニューだけで行い、重複確認とINSERTは chunk_size 件ごとにまとめる。
+    """
+    schedule = get_schedule(tenant)
+    menus = {menu.name: menu for menu in Menu.objects.filter(tenant=tenant)}
+    result = ImportResult()
+    seen = set()
+    chunk = []
+    for line, row, error in rows:
+        if error:
+            result.add_error(line, error)
+            continue
+        try:
+            reservation = build_reservation(tenant, schedule, menus, row)
+        except ValidationError as e:
+            result.add_error(line, ' '.join(e.messages))
+            continue
+        key = (reservation.date, reservation.time_slot)
+        if key in seen:
+            result.add_error(line, 'ファイル内で同じ日時が重複しています')
+            continue
+        seen.add(key)
+        chunk.append((line, reservation))
+        if len(chunk) >= chunk_size:
+            _import_chunk(tenant, chunk, result)
+            chunk = []
+    if chunk:
+        _import_chunk(tenant, chunk, result)
+    return result
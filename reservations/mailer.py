@@ -0,0 +1,77 @@
+import smtplib
+import threading
+import time
+from django.conf import settings
+from django.core.mail import get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# この秒数以上使われなかった接続はサーバー側で切られている可能性があるため張り直す
+SMTP_IDLE_TIMEOUT = getattr(settings, 'SMTP_IDLE_TIMEOUT', 30)
+
+_local = threading.local()
+
+
+class NotificationSender:
+    """1本のメール接続を使い回して通知メールを送信する
+
+    接続は最初の送信時に開き、一定時間使われなければ次の送信時に張り直す。
+    送信中に切断された場合は1回だけ再接続して送り直す。
+    """
+
+    def __init__(self, idle_timeout=SMTP_IDLE_TIMEOUT, backend=None, **connection_kwargs):
+        self.idle_timeout = idle_timeout
+        self.backend = backend
+        self.connection_kwargs = connection_kwargs
+        self._connection = None
+        self._last_used = 0.0
+
+    def _open(self):
+        connection = get_connection(self.backend, fail_silently=False, **self.connection_kwargs)
+        connection.open()
+        self._connection = connection
+        return connection
+
+    def _get_connection(self):
+        if self._connection is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+        if self._connection is None:
+            self._open()
+        return self._connection
+
+    def send_messages(self, messages):
+        """メッセージをまとめて送信し、送信件数を返す"""
+        messages = [message for message in messages if message is not None]
+        if not messages:
+            return 0
+        try:
+            sent = self._get_connection().send_messages(messages)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            logger.info("メール接続が切断されていたため再接続します")
+            self.close()
+            sent = self._get_connection().send_messages(messages)
+        self._last_used = time.monotonic()
+        return sent
+
+    def send(self, message):
+        """メッセージを1件送信"""
+        return self.send_messages([message])
+
+    def close(self):
+        """接続を閉じる"""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"メール接続の切断でエラーが発生しました: {e}")
+
+
+def get_sender():
+    """スレッドごとに共有する送信オブジェクトを返す（ワーカー内で接続を使い回す）"""
+    sender = getattr(_local, 'sender', None)
+    if sender is None:
+        sender = NotificationSender()
+        _local.sender = sender
+    return sender
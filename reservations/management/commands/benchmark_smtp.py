@@ -0,0 +1,112 @@
+import socketserver
+import threading
+import time
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from reservations.mailer import NotificationSender
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """受け取ったメールを捨てるだけのSMTPサーバー（ベンチマーク用）"""
+
+    def reply(self, *lines):
+        self.wfile.write(''.join(f"{line}\r\n" for line in lines).encode('ascii'))
+
+    def handle(self):
+        # 接続ごとの擬似遅延（TLSハンドシェイクや遠隔サーバーの代わり）
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+        self.reply('220 localhost SMTP stand-in')
+        in_data = False
+        for raw in self.rfile:
+            line = raw.rstrip(b'\r\n')
+            if in_data:
+                if line == b'.':
+                    in_data = False
+                    self.server.received += 1
+                    self.reply('250 OK')
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply('250-localhost', '250 8BITMIME')
+            elif command == b'DATA':
+                in_data = True
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_latency=0.0):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.connect_latency = connect_latency
+        self.received = 0
+
+
+class Command(BaseCommand):
+    help = 'ローカルのSMTPスタンドインに対して、1通ごとの接続と接続の使い回しの送信速度を比較します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='送信するメール数（既定: 200）')
+        parser.add_argument('--connect-latency', type=float, default=0.0,
+                            help='接続ごとに加える擬似遅延（秒）。TLSハンドシェイクの代わり')
+
+    def build_messages(self, count):
+        return [
+            EmailMessage(
+                subject=f'【予約確認】ベンチマーク {i}',
+                body='ご予約が完了いたしました。',
+                from_email='bench@example.com',
+                to=['customer@example.com'],
+            )
+            for i in range(count)
+        ]
+
+    def run(self, server, send_all):
+        server.received = 0
+        started = time.perf_counter()
+        send_all()
+        elapsed = time.perf_counter() - started
+        return server.received / elapsed
+
+    def handle(self, *args, **options):
+        count = options['count']
+        server = SMTPStandIn(connect_latency=options['connect_latency'])
+        host, port = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        connection_kwargs = {
+            'host': host, 'port': port, 'use_tls': False, 'use_ssl': False,
+            'username': '', 'password': '',
+        }
+
+        def per_message():
+            # 従来方式: send_mail と同じく1通ごとに接続を開いて閉じる
+            for message in self.build_messages(count):
+                get_connection(SMTP_BACKEND, fail_silently=False, **connection_kwargs).send_messages([message])
+
+        def pooled():
+            # NotificationSender: 1本の接続から送る
+            sender = NotificationSender(backend=SMTP_BACKEND, **connection_kwargs)
+            for message in self.build_messages(count):
+                sender.send(message)
+            sender.close()
+
+        try:
+            per_message_rate = self.run(server, per_message)
+            pooled_rate = self.run(server, pooled)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(f"送信数: {count}通 / 接続ごとの擬似遅延: {options['connect_latency']}秒")
+        self.stdout.write(f"1通ごとに接続: {per_message_rate:,.0f} 通/秒")
+        self.stdout.write(f"接続の使い回し: {pooled_rate:,.0f} 通/秒")
+        self.stdout.write(self.style.SUCCESS(f"速度比: {pooled_rate / per_message_rate:.1f}倍"))
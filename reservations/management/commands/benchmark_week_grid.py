@@ -0,0 +1,75 @@
+import time as timer
+from datetime import date, time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from reservations.models import CustomUser, Reservation, Tenant
+from reservations.schedule import get_tenant_time_slots, is_open_day
+from reservations.week_grid import build_week_grid, week_start
+
+
+def legacy_week_rows(tenant, week_days):
+    """以前の各ビューと同じ組み立て方（比較用）"""
+    time_slots = get_tenant_time_slots(tenant)
+    reservations = Reservation.objects.filter(tenant=tenant, date__in=week_days)
+    res_dict = {f"{r.date}_{r.time_slot}": r for r in reservations}
+    calendar_rows = []
+    for slot in time_slots:
+        row = []
+        for day in week_days:
+            key = f"{day}_{slot}"
+            row.append({
+                'day': day,
+                'slot': slot,
+                'reservation': res_dict.get(key),
+                'is_open_day': is_open_day(day, tenant),
+                'key': f"{day}_{slot.strftime('%H-%M')}"
+            })
+        calendar_rows.append(row)
+    return calendar_rows
+
+
+class Command(BaseCommand):
+    help = '週グリッドの組み立てを以前の実装と比較します（一時データはロールバックします）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='計測の繰り返し回数（既定: 50）')
+        parser.add_argument('--slot-duration', type=int, default=15, help='予約枠の長さ（分、既定: 15）')
+
+    def measure(self, build, iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            build()
+        queries = len(ctx.captured_queries)
+        started = timer.perf_counter()
+        for _ in range(iterations):
+            build()
+        return (timer.perf_counter() - started) / iterations * 1000, queries
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        with transaction.atomic():
+            owner = CustomUser.objects.create_user(
+                username='benchmark-week-grid', email='benchmark-week-grid@example.com', password=None, role='owner',
+            )
+            tenant = Tenant.objects.create(
+                name='ベンチマーク', slug='benchmark-week-grid', owner=owner,
+                start_time=time(0, 0), end_time=time(23, 59), slot_duration=options['slot_duration'],
+            )
+            start = week_start(date.today(), 1)
+            week_days = [start + timedelta(days=i) for i in range(7)]
+            # 全枠が埋まった週
+            Reservation.objects.bulk_create(
+                Reservation(tenant=tenant, date=day, time_slot=slot, customer_name=f'客{i}')
+                for day in week_days
+                for i, slot in enumerate(get_tenant_time_slots(tenant))
+            )
+            cells = len(week_days) * len(get_tenant_time_slots(tenant))
+
+            legacy_ms, legacy_queries = self.measure(lambda: legacy_week_rows(tenant, week_days), iterations)
+            grid_ms, grid_queries = self.measure(lambda: build_week_grid(tenant, start), iterations)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"グリッド: {cells}マス（全枠予約済み）/ {iterations}回の平均")
+        self.stdout.write(f"以前の実装: {legacy_ms:.2f} ms（クエリ {legacy_queries}回）")
+        self.stdout.write(f"build_week_grid: {grid_ms:.2f} ms（クエリ {grid_queries}回）")
+        self.stdout.write(self.style.SUCCESS(f"速度比: {legacy_ms / grid_ms:.1f}倍"))
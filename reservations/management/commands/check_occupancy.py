@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from reservations.models import Tenant
+from reservations.caching import OCCUPANCY
+from reservations.occupancy import load_occupancy, occupancy_key, refresh_occupancy
+from reservations.schedule import get_schedule
+
+
+class Command(BaseCommand):
+    help = 'キャッシュ上の占有ビットマップと予約テーブルの整合性を確認します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='対象テナントのslug（省略時は全テナント）')
+        parser.add_argument('--from', dest='from_date', help='開始日 YYYY-MM-DD（省略時は今日）')
+        parser.add_argument('--days', type=int, default=31, help='確認する日数（既定: 31）')
+        parser.add_argument('--fix', action='store_true', help='不一致のビットマップをテーブルから作り直す')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = datetime.strptime(options['from_date'], '%Y-%m-%d').date() if options['from_date'] else date.today()
+        except ValueError:
+            raise CommandError('日付の形式が正しくありません（YYYY-MM-DD）')
+
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"テナントが見つかりません: {options['tenant']}")
+
+        checked = mismatched = 0
+        for tenant in tenants:
+            schedule = get_schedule(tenant)
+            for offset in range(options['days']):
+                target_date = start_date + timedelta(days=offset)
+                cached = OCCUPANCY.get(occupancy_key(schedule, target_date))
+                if cached is None:
+                    # 未キャッシュの日は次回の参照時に作られるため対象外
+                    continue
+                checked += 1
+                actual = load_occupancy(tenant, target_date)
+                if cached == actual:
+                    continue
+                mismatched += 1
+                self.stdout.write(self.style.WARNING(
+                    f"{tenant.slug} {target_date}: cache={cached:b} table={actual:b}"
+                ))
+                if options['fix']:
+                    refresh_occupancy(tenant, target_date)
+
+        summary = f"確認: {checked}件 / 不一致: {mismatched}件"
+        if mismatched and not options['fix']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
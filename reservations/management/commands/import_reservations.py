@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from reservations.importing import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, guess_format, import_reservations, read_rows
+from reservations.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'CSV / JSON Lines ファイルから予約を一括で取り込みます（通知は送りません）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='取り込むファイル')
+        parser.add_argument('--tenant', required=True, help='取り込み先テナントのslug')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='ファイル形式（既定: 拡張子から判定）')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help=f'まとめて登録する件数（既定: {IMPORT_CHUNK_SIZE}）')
+
+    def handle(self, *args, **options):
+        tenant = Tenant.objects.filter(slug=options['tenant']).first()
+        if tenant is None:
+            raise CommandError(f"テナントが見つかりません: {options['tenant']}")
+
+        fmt = options['format'] or guess_format(options['path'])
+        if fmt is None:
+            raise CommandError('ファイル形式を判定できません。--format を指定してください')
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = import_reservations(tenant, read_rows(stream, fmt), chunk_size=options['chunk_size'])
+        except OSError as e:
+            raise CommandError(f"ファイルを開けません: {e}")
+        except UnicodeDecodeError:
+            raise CommandError('ファイルはUTF-8で保存してください')
+
+        for error in result.as_dict()['errors']:
+            self.stderr.write(f"{error['line']}行目: {error['message']}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"ほか{result.error_count - len(result.errors)}件のエラーがあります")
+        self.stdout.write(self.style.SUCCESS(f"{result.created}件を登録しました（エラー {result.error_count}件）"))
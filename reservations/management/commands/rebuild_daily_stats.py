@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from reservations.models import Tenant
+from reservations.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = '予約テーブルから日別予約集計（DailyReservationStat）を作り直します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help='対象テナントのslug（省略時は全テナント）')
+        parser.add_argument('--batch-size', type=int, default=1000, help='bulk_createの件数（既定: 1000）')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"テナントが見つかりません: {options['tenant']}")
+
+        created = rebuild_daily_stats(tenants, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"日別予約集計を{created}件作成しました"))
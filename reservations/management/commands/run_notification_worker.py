@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from reservations.mailer import get_sender
+from reservations.notifications import process_batch
+
+
+class Command(BaseCommand):
+    help = '通知キュー（NotificationOutbox）の送信待ちをまとめて送信します（失敗分は再送）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='1回に取得する件数（既定: 100）')
+        parser.add_argument('--interval', type=float, default=5.0, help='キューが空のときの待機秒数（既定: 5）')
+        parser.add_argument('--once', action='store_true', help='キューが空になったら終了する')
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = process_batch(batch_size=options['batch_size'])
+                total += processed
+                if processed:
+                    self.stdout.write(f"{processed}件の通知を処理しました")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            get_sender().close()
+        self.stdout.write(self.style.SUCCESS(f"合計{total}件の通知を処理しました"))
@@ -0,0 +1,31 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from reservations.reminders import REMINDER_CHUNK_SIZE, run_reminders
+
+
+class Command(BaseCommand):
+    help = '翌日の予約に前日リマインド（メール・SMS）を送信します（送信済みの予約には再送しません）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='対象日（YYYY-MM-DD、既定: 明日）')
+        parser.add_argument('--chunk-size', type=int, default=REMINDER_CHUNK_SIZE,
+                            help=f'予約を読み込む単位（既定: {REMINDER_CHUNK_SIZE}）')
+        parser.add_argument('--batch-size', type=int, default=500, help='1回に送信する通知数（既定: 500）')
+        parser.add_argument('--enqueue-only', action='store_true',
+                            help='通知キューに積むだけにして送信は run_notification_worker に任せる')
+
+    def handle(self, *args, **options):
+        target_date = None
+        if options['date']:
+            try:
+                target_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('日付の形式が正しくありません（YYYY-MM-DD）')
+
+        count, processed = run_reminders(
+            target_date=target_date,
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            send=not options['enqueue_only'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"予約{count}件のリマインドを確認し、{processed}件の通知を処理しました"))
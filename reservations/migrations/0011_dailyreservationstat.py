@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:27
+
+import django.db.models.deletion
+from datetime import date, datetime, timedelta
+from django.db import migrations, models
+
+
+def populate_daily_stats(apps, schema_editor):
+    """既存の予約から日別集計を作成"""
+    Tenant = apps.get_model('reservations', 'Tenant')
+    Reservation = apps.get_model('reservations', 'Reservation')
+    DailyReservationStat = apps.get_model('reservations', 'DailyReservationStat')
+
+    for tenant in Tenant.objects.all():
+        slots = 0
+        current = datetime.combine(date(2000, 1, 1), tenant.start_time)
+        end = datetime.combine(date(2000, 1, 1), tenant.end_time)
+        while current < end:
+            slots += 1
+            current += timedelta(minutes=tenant.slot_duration)
+        open_days = [
+            tenant.monday_open, tenant.tuesday_open, tenant.wednesday_open,
+            tenant.thursday_open, tenant.friday_open, tenant.saturday_open, tenant.sunday_open,
+        ]
+
+        stats = []
+        counts = (
+            Reservation.objects.filter(tenant=tenant)
+            .order_by()
+            .values_list('date')
+            .annotate(count=models.Count('id'))
+        )
+        for day, count in counts:
+            slot_count = slots if open_days[day.weekday()] else 0
+            stats.append(DailyReservationStat(
+                tenant=tenant,
+                date=day,
+                reservation_count=count,
+                slot_count=slot_count,
+                free_slot_count=max(slot_count - count, 0),
+                occupancy_ratio=count / slot_count if slot_count else 0.0,
+            ))
+        DailyReservationStat.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0010_remove_reservation_number_of_people_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReservationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日付')),
+                ('reservation_count', models.IntegerField(default=0, verbose_name='予約件数')),
+                ('slot_count', models.IntegerField(default=0, verbose_name='予約枠数')),
+                ('free_slot_count', models.IntegerField(default=0, verbose_name='空き枠数')),
+                ('occupancy_ratio', models.FloatField(default=0.0, verbose_name='稼働率')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新日時')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='reservations.tenant', verbose_name='テナント')),
+            ],
+            options={
+                'verbose_name': '日別予約集計',
+                'verbose_name_plural': '日別予約集計',
+                'ordering': ['tenant', 'date'],
+                'unique_together': {('tenant', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
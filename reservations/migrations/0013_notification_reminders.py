@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0012_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificationoutbox',
+            name='kind',
+            field=models.CharField(choices=[('customer_email', '予約確認メール'), ('owner_email', '事業者通知メール'), ('sms', 'SMS'), ('customer_reminder', '前日リマインドメール'), ('sms_reminder', '前日リマインドSMS')], max_length=20, verbose_name='種別'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationoutbox',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind__in', ['customer_reminder', 'sms_reminder'])), fields=('reservation', 'kind'), name='unique_reminder_per_reservation'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0013_notification_reminders'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['tenant', 'created_at'], name='reservation_tenant__f54329_idx'),
+        ),
+    ]
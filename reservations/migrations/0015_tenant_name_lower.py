@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:55
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def populate_name_lower(apps, schema_editor):
+    """既存のテナントの店舗名（小文字）を設定"""
+    Tenant = apps.get_model('reservations', 'Tenant')
+    Tenant.objects.update(name_lower=Lower('name'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0014_reservation_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='name_lower',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='店舗名（小文字）'),
+        ),
+        migrations.RunPython(populate_name_lower, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tenant',
+            index=models.Index(fields=['name_lower'], name='tenant_name_lower_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
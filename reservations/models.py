@@ -1,10 +1,12 @@
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from datetime import time
+from .schedule import get_schedule, invalidate_schedule
 
 class CustomUser(AbstractUser):
     USER_ROLES = [
@@ -34,6 +36,8 @@ class CustomUser(AbstractUser):
 class Tenant(models.Model):
     name = models.CharField(max_length=100, verbose_name='店舗名')
     slug = models.SlugField(max_length=100, unique=True, blank=True, null=True, verbose_name='URL識別子')
+    # 店舗名の前方一致検索用（保存時に name から設定）
+    name_lower = models.CharField(max_length=100, editable=False, default='', verbose_name='店舗名（小文字）')
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='tenants', verbose_name='オーナー')
     
     # 予約カレンダー設定（バリデーション追加）
@@ -124,6 +128,10 @@ class Tenant(models.Model):
         verbose_name = 'テナント'
         verbose_name_plural = 'テナント'
         ordering = ['name']
+        indexes = [
+            # LIKE 'abc%' でインデックスを使えるようにする（PostgreSQL）
+            models.Index(fields=['name_lower'], name='tenant_name_lower_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def clean(self):
         """モデルレベルでのバリデーション"""
@@ -155,6 +163,7 @@ class Tenant(models.Model):
         ]
     
     def save(self, *args, **kwargs):
+        self.name_lower = self.name.lower()
         # フルクリーンバリデーションを実行
         self.full_clean()
         
@@ -167,6 +176,8 @@ class Tenant(models.Model):
                 counter += 1
             self.slug = slug
         super().save(*args, **kwargs)
+        # 営業設定が変わった可能性があるためスケジュールのメモ化を破棄
+        invalidate_schedule(self.pk)
 
 class Menu(models.Model):
     tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='menus', verbose_name='テナント')
@@ -210,51 +221,124 @@ class Reservation(models.Model):
         indexes = [
             models.Index(fields=['tenant', 'date']),
             models.Index(fields=['date', 'time_slot']),
+            models.Index(fields=['tenant', 'created_at']),
         ]
     
     def clean(self):
-        """予約のバリデーション"""
+        """予約のバリデーション
+
+        読み込み済みのテナント・メニューだけを使い、DBへの問い合わせは行わない。
+        """
         super().clean()
         from datetime import datetime, timedelta
-        from django.utils import timezone
+        
+        now = timezone.now()
         
         # 過去の日付への予約を防ぐ
-        today = datetime.now().date()
-        if self.date < today:
+        if self.date < timezone.localdate(now):
             raise ValidationError('過去の日付には予約できません。')
         
-        # メニューとテナントの整合性チェック
-        if self.menu and self.menu.tenant != self.tenant:
+        # メニューとテナントの整合性チェック（IDで比較し、メニューのテナントを読み込まない）
+        if self.menu_id is not None and self.menu.tenant_id != self.tenant_id:
             raise ValidationError('選択されたメニューはこのテナントのものではありません。')
         
+        schedule = get_schedule(self.tenant) if self.tenant_id is not None else None
+        
         # 予約時間帯のバリデーション
-        if self.time_slot and self.tenant:
+        if self.time_slot and schedule:
             # 営業終了時間を過ぎる予約はできない
-            end_time = datetime.combine(self.date, self.tenant.end_time)
+            end_time = datetime.combine(self.date, schedule.end_time)
             reservation_time = datetime.combine(self.date, self.time_slot)
             if reservation_time >= end_time:
                 raise ValidationError('営業終了時間を過ぎる予約はできません。')
         
         # 予約可能時間のバリデーション
-        if self.tenant and self.date:
-            now = timezone.now()
+        if schedule and self.date:
             reservation_datetime = timezone.make_aware(datetime.combine(self.date, self.time_slot))
-            advance_time = timedelta(hours=self.tenant.advance_hours)
+            advance_time = timedelta(hours=schedule.advance_hours)
             if reservation_datetime < now + advance_time:
-                raise ValidationError(f"現在時刻から{self.tenant.advance_hours}時間後以降で予約してください。")
+                raise ValidationError(f"現在時刻から{schedule.advance_hours}時間後以降で予約してください。")
     
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+    def save(self, *args, trusted=False, **kwargs):
+        """保存前に検証する
+
+        trusted=True は、読み込み済みのテナント・メニューを渡し重複をDBの一意制約に
+        任せる呼び出し側（booking.book_slot）向け。外部キーの存在確認と重複確認の
+        SELECTを省き、入力値・日時の検証だけを行う。
+        """
+        if trusted:
+            self.full_clean(exclude=['tenant', 'menu'], validate_unique=False, validate_constraints=False)
+        else:
+            self.full_clean()
+        # 通知キューなどpost_saveでの書き込みを予約と同じトランザクションにする
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"{self.customer_name} - {self.tenant.name} ({self.date} {self.time_slot})"
+        return f"{self.tenant.name} {self.date} {self.time_slot} {self.customer_name}"
+
+class DailyReservationStat(models.Model):
+    """(テナント, 日付)ごとの予約件数集計（予約の作成・削除時にその日の件数を数え直す）"""
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='daily_stats', verbose_name='テナント')
+    date = models.DateField(verbose_name='日付')
+    reservation_count = models.IntegerField(default=0, verbose_name='予約件数')
+    slot_count = models.IntegerField(default=0, verbose_name='予約枠数')
+    free_slot_count = models.IntegerField(default=0, verbose_name='空き枠数')
+    occupancy_ratio = models.FloatField(default=0.0, verbose_name='稼働率')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新日時')
     
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        verbose_name = '日別予約集計'
+        verbose_name_plural = '日別予約集計'
+        ordering = ['tenant', 'date']
+        unique_together = ['tenant', 'date']
     
     def __str__(self):
-        return f"{self.customer_name} - {self.tenant.name} ({self.date} {self.time_slot})"
+        return f"{self.tenant_id} {self.date} {self.reservation_count}件"
+
+class NotificationOutbox(models.Model):
+    """予約通知の送信待ちキュー（予約と同じトランザクションで書き込む）"""
+    KIND_CHOICES = [
+        ('customer_email', '予約確認メール'),
+        ('owner_email', '事業者通知メール'),
+        ('sms', 'SMS'),
+        ('customer_reminder', '前日リマインドメール'),
+        ('sms_reminder', '前日リマインドSMS'),
+    ]
+    # 予約ごとに1回だけ送る種別（二重送信を一意制約で防ぐ）
+    REMINDER_KINDS = ['customer_reminder', 'sms_reminder']
+    STATUS_CHOICES = [
+        ('pending', '送信待ち'),
+        ('sent', '送信済み'),
+        ('failed', '送信失敗'),
+        ('skipped', '送信対象なし'),
+    ]
+    
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='notifications', verbose_name='予約')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='種別')
+    recipient = models.CharField(max_length=254, blank=True, default='', verbose_name='送信先')
+    body = models.TextField(blank=True, default='', verbose_name='本文')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='状態')
+    attempts = models.IntegerField(default=0, verbose_name='試行回数')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='次回送信日時')
+    last_error = models.TextField(blank=True, default='', verbose_name='最後のエラー')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='作成日時')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='送信日時')
+    
+    class Meta:
+        verbose_name = '通知キュー'
+        verbose_name_plural = '通知キュー'
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reservation', 'kind'],
+                condition=models.Q(kind__in=['customer_reminder', 'sms_reminder']),
+                name='unique_reminder_per_reservation',
+            ),
+        ]
+    
     def __str__(self):
-        return f"{self.tenant.name} {self.date} {self.time_slot} {self.customer_name}"
+        return f"{self.get_kind_display()} {self.recipient} ({self.get_status_display()})"
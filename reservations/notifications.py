@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import NotificationOutbox
+from .sms import send_sms
+from .utils import send_reminder_email, send_reservation_confirmation_email, send_business_notification_email
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 送信処理を確保してから完了するまでの猶予（この間は他のワーカーが取得しない）
+CLAIM_LEASE = timedelta(minutes=5)
+# 最大試行回数（超えたら failed）
+MAX_ATTEMPTS = 5
+# コミット後の送信に使うスレッド数の上限
+NOTIFICATION_THREADS = getattr(settings, 'NOTIFICATION_THREADS', 2)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """コミット後の送信に使うスレッドプール（プロセスごとに1つ、スレッド数は上限あり）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=NOTIFICATION_THREADS, thread_name_prefix='notification')
+        return _executor
+
+def retry_delay(attempts):
+    """再送までの待ち時間（指数バックオフ）"""
+    return timedelta(minutes=2 ** (attempts - 1))
+
+def enqueue_reservation_emails(reservation):
+    """予約確認メール・事業者通知メールを通知キューに積む"""
+    if not settings.ENABLE_RESERVATION_NOTIFICATIONS:
+        logger.info("メール通知が無効になっています")
+        return []
+
+    tenant = reservation.tenant
+    notifications = []
+    if reservation.customer_email:
+        notifications.append(NotificationOutbox(
+            reservation=reservation, kind='customer_email', recipient=reservation.customer_email,
+        ))
+    else:
+        logger.warning(f"予約ID {reservation.id}: 顧客のメールアドレスが設定されていません")
+
+    owner_email = tenant.notification_email or tenant.owner.email
+    if owner_email:
+        notifications.append(NotificationOutbox(
+            reservation=reservation, kind='owner_email', recipient=owner_email,
+        ))
+    else:
+        logger.warning(f"予約ID {reservation.id}: 事業者の通知先メールアドレスが設定されていません")
+
+    return enqueue(notifications)
+
+def enqueue_sms(reservation, to_number, message):
+    """SMSを通知キューに積む"""
+    if not to_number:
+        return []
+    return enqueue([NotificationOutbox(
+        reservation=reservation, kind='sms', recipient=to_number, body=message,
+    )])
+
+def enqueue(notifications):
+    """通知を保存し、コミット後に送信を開始する"""
+    if not notifications:
+        return []
+    # bulk_createでIDが返らないDBもあるため1件ずつ保存する（通常2〜4件）
+    for notification in notifications:
+        notification.save()
+    ids = [notification.id for notification in notifications]
+    transaction.on_commit(lambda: dispatch(ids))
+    return notifications
+
+def dispatch(ids):
+    """コミット後の送信（設定によりバックグラウンドスレッド・即時・ワーカー任せ）"""
+    mode = getattr(settings, 'NOTIFICATION_DISPATCH', 'thread')
+    if mode == 'inline':
+        process_batch(ids=ids)
+    elif mode == 'thread':
+        _get_executor().submit(_process_in_thread, ids)
+    # 'worker' の場合は run_notification_worker に任せる
+
+def _process_in_thread(ids):
+    try:
+        process_batch(ids=ids)
+    except Exception as e:
+        # 失敗分は run_notification_worker が再送する
+        logger.error(f"通知のバックグラウンド送信でエラーが発生しました: {e}")
+    finally:
+        connection.close()
+
+def claim_due(batch_size=100, ids=None):
+    """送信期限の来た通知を取得し、リース期間だけ他のワーカーから隠す"""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = NotificationOutbox.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            status='pending', next_attempt_at__lte=now,
+        )
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        claimed = list(queryset.select_related('reservation__tenant__owner')[:batch_size])
+        NotificationOutbox.objects.filter(id__in=[n.id for n in claimed]).update(
+            next_attempt_at=now + CLAIM_LEASE,
+        )
+    return claimed
+
+def deliver(notification):
+    """通知1件を送信（送信した場合True、送る内容がなければFalse。送信エラーは例外）"""
+    reservation = notification.reservation
+    if notification.kind == 'customer_email':
+        return send_reservation_confirmation_email(reservation)
+    if notification.kind == 'owner_email':
+        return send_business_notification_email(reservation)
+    if notification.kind == 'customer_reminder':
+        return send_reminder_email(reservation)
+    if notification.kind in ('sms', 'sms_reminder'):
+        send_sms(notification.recipient, notification.body)
+        return True
+    raise ValueError(f"未対応の通知種別です: {notification.kind}")
+
+def record_result(notification, sent, error=''):
+    """送信結果を通知キューに記録"""
+    notification.attempts += 1
+    if sent:
+        notification.status = 'sent'
+        notification.sent_at = timezone.now()
+        notification.last_error = ''
+    else:
+        notification.last_error = error or '送信に失敗しました'
+        if notification.attempts >= MAX_ATTEMPTS:
+            notification.status = 'failed'
+            logger.error(f"通知ID {notification.id}: {notification.attempts}回失敗したため送信を中止しました")
+        else:
+            notification.next_attempt_at = timezone.now() + retry_delay(notification.attempts)
+    notification.save(update_fields=['attempts', 'status', 'sent_at', 'last_error', 'next_attempt_at'])
+
+def record_skipped(notification):
+    """送る内容がなかった（宛先がない・通知が無効）ことを記録する（再送しない）"""
+    notification.attempts += 1
+    notification.status = 'skipped'
+    notification.last_error = ''
+    notification.save(update_fields=['attempts', 'status', 'last_error'])
+
+def process_batch(batch_size=100, ids=None):
+    """送信期限の来た通知をまとめて送信し、処理件数を返す"""
+    notifications = claim_due(batch_size=batch_size, ids=ids)
+    for notification in notifications:
+        try:
+            sent = deliver(notification)
+        except Exception as e:
+            logger.error(f"通知ID {notification.id}: 送信処理でエラーが発生しました: {e}")
+            record_result(notification, False, str(e))
+            continue
+        if sent:
+            record_result(notification, True)
+        else:
+            record_skipped(notification)
+    return len(notifications)
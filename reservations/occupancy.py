@@ -0,0 +1,63 @@
+from django.db import transaction
+from .caching import OCCUPANCY
+from .models import Reservation
+from .schedule import get_schedule
+
+
+def occupancy_key(schedule, target_date):
+    """(テナント, 日付)の占有ビットマップのキャッシュキー"""
+    return OCCUPANCY.key(schedule.tenant_id, f'{target_date:%Y%m%d}', schedule.layout_key)
+
+def build_occupancy(schedule, time_slots):
+    """予約済み時間枠から占有ビットマップ（枠番号ごとに1ビット）を作る"""
+    bitmap = 0
+    for time_slot in time_slots:
+        index = schedule.slot_index(time_slot)
+        if index is not None:
+            bitmap |= 1 << index
+    return bitmap
+
+def load_occupancy(tenant, target_date):
+    """DBから指定日の占有ビットマップを組み立てる"""
+    schedule = get_schedule(tenant)
+    time_slots = Reservation.objects.filter(
+        tenant_id=schedule.tenant_id, date=target_date
+    ).values_list('time_slot', flat=True)
+    return build_occupancy(schedule, time_slots)
+
+def get_occupancy(tenant, target_date):
+    """占有ビットマップを返す（キャッシュになければDBから作り直す）
+
+    同じ日への同時アクセスでは1リクエストだけがDBを読む。
+    """
+    key = occupancy_key(get_schedule(tenant), target_date)
+    return OCCUPANCY.get_or_compute(key, lambda: load_occupancy(tenant, target_date))
+
+def get_reserved_times(tenant, target_date):
+    """占有ビットマップから予約済み時間枠の集合を返す"""
+    schedule = get_schedule(tenant)
+    bitmap = get_occupancy(tenant, target_date)
+    return {slot for index, slot in enumerate(schedule.slots) if bitmap >> index & 1}
+
+def refresh_occupancy(tenant, target_date):
+    """コミット済みの予約から占有ビットマップを作り直してキャッシュする"""
+    key = occupancy_key(get_schedule(tenant), target_date)
+    OCCUPANCY.set(key, load_occupancy(tenant, target_date))
+
+def schedule_occupancy_refresh(tenant, target_date):
+    """トランザクションのコミット後に占有ビットマップを更新する
+
+    同じ日の予約が同時に書き込まれてもビット単位の読み書きで取りこぼさないよう、
+    差分更新ではなくコミット後のテーブルから作り直す。
+    """
+    transaction.on_commit(lambda: refresh_occupancy(tenant, target_date))
+
+def schedule_occupancy_invalidation(tenant, dates):
+    """トランザクションのコミット後に複数日の占有ビットマップを破棄する（一括登録・削除用）
+
+    次に参照された日だけテーブルから作り直す。
+    """
+    schedule = get_schedule(tenant)
+    keys = [occupancy_key(schedule, day) for day in dates]
+    if keys:
+        transaction.on_commit(lambda: OCCUPANCY.delete_many(keys))
@@ -0,0 +1,101 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+from .models import Reservation
+
+# 1ページの件数（既定値と上限）
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """カーソルを解釈できない"""
+
+
+def encode_cursor(reservation_date, time_slot, reservation_id):
+    """(日付, 時間, ID) をURLに載せられる文字列にする"""
+    raw = f"{reservation_date:%Y-%m-%d}|{time_slot:%H:%M:%S}|{reservation_id}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """encode_cursor の逆変換（不正ならInvalidCursor）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        date_str, time_str, id_str = raw.split('|')
+        return (
+            datetime.strptime(date_str, '%Y-%m-%d').date(),
+            datetime.strptime(time_str, '%H:%M:%S').time(),
+            int(id_str),
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('カーソルが正しくありません')
+
+def filter_reservations(tenant, start_date=None, end_date=None, menu_id=None, query=''):
+    """一覧の絞り込み（期間・メニュー・顧客名/電話番号/メールアドレス）"""
+    queryset = Reservation.objects.filter(tenant=tenant)
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    if menu_id:
+        queryset = queryset.filter(menu_id=menu_id)
+    if query:
+        queryset = queryset.filter(
+            Q(customer_name__icontains=query)
+            | Q(customer_phone__icontains=query)
+            | Q(customer_email__icontains=query)
+        )
+    return queryset
+
+def paginate_reservations(queryset, cursor=None, page_size=PAGE_SIZE):
+    """新しい順に1ページ分を返す（戻り値は (予約のリスト, 次ページのカーソル)）
+
+    OFFSETではなく (date, time_slot, id) のキーセットで続きを取得する。
+    条件は行値比較ではなく OR に展開した形で書き、date <= 前ページの最後の日付 を
+    併せて指定することで、何ページ目でも (tenant, date, time_slot) のインデックスを
+    範囲検索するだけで済む。
+    """
+    queryset = queryset.order_by('-date', '-time_slot', '-id')
+    if cursor:
+        last_date, last_time, last_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(date__lte=last_date),
+            Q(date__lt=last_date)
+            | Q(date=last_date, time_slot__lt=last_time)
+            | Q(date=last_date, time_slot=last_time, id__lt=last_id),
+        )
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last['date'], last['time_slot'], last['id'])
+        else:
+            next_cursor = encode_cursor(last.date, last.time_slot, last.id)
+    return rows, next_cursor
+
+def parse_list_params(params):
+    """GETパラメータから絞り込み条件とページ指定を取り出す（不正ならValueError）"""
+    try:
+        start_date = datetime.strptime(params['from'], '%Y-%m-%d').date() if params.get('from') else None
+        end_date = datetime.strptime(params['to'], '%Y-%m-%d').date() if params.get('to') else None
+    except ValueError:
+        raise ValueError('日付の形式が正しくありません')
+    menu_id = params.get('menu') or None
+    if menu_id and not menu_id.isdigit():
+        raise ValueError('メニューの指定が正しくありません')
+    limit = params.get('limit') or str(PAGE_SIZE)
+    if not limit.isdigit():
+        raise ValueError('件数の指定が正しくありません')
+    page_size = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    return {
+        'filters': {
+            'start_date': start_date,
+            'end_date': end_date,
+            'menu_id': menu_id,
+            'query': params.get('q', '').strip(),
+        },
+        'cursor': params.get('cursor') or None,
+        'page_size': page_size,
+    }
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .email_templates import REMINDER_SMS, template_values
+from .mailer import get_sender
+from .models import NotificationOutbox, Reservation
+from .notifications import process_batch
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 予約を読み込む単位（この件数ずつ通知キューに書き込む）
+REMINDER_CHUNK_SIZE = 2000
+
+
+def due_reservations(target_date):
+    """リマインド対象の予約（ブロック枠を除く）をテナント・オーナー付きで返す"""
+    return (
+        Reservation.objects.filter(date=target_date)
+        .exclude(customer_name='BLOCKED')
+        .select_related('tenant', 'tenant__owner')
+        .order_by('id')
+    )
+
+def build_reminders(reservation):
+    """予約1件分のリマインド通知（未保存）を返す"""
+    notifications = []
+    if reservation.customer_email:
+        notifications.append(NotificationOutbox(
+            reservation=reservation, kind='customer_reminder', recipient=reservation.customer_email,
+        ))
+    if reservation.customer_phone:
+        notifications.append(NotificationOutbox(
+            reservation=reservation, kind='sms_reminder', recipient=reservation.customer_phone,
+            body=REMINDER_SMS.render(template_values(reservation)),
+        ))
+    return notifications
+
+def enqueue_reminders(target_date, chunk_size=REMINDER_CHUNK_SIZE):
+    """対象日の予約を少しずつ読みながらリマインドを通知キューに積み、対象予約数を返す
+
+    予約×種別の一意制約により、既に積んだ（送信済みを含む）リマインドは追加されない。
+    """
+    count = 0
+    pending = []
+    for reservation in due_reservations(target_date).iterator(chunk_size=chunk_size):
+        count += 1
+        pending.extend(build_reminders(reservation))
+        if len(pending) >= chunk_size:
+            NotificationOutbox.objects.bulk_create(pending, ignore_conflicts=True)
+            pending = []
+    if pending:
+        NotificationOutbox.objects.bulk_create(pending, ignore_conflicts=True)
+    return count
+
+def run_reminders(target_date=None, chunk_size=REMINDER_CHUNK_SIZE, batch_size=500, send=True):
+    """翌日（または指定日）のリマインドを積んで送信する（cron等から呼ぶ入口）
+
+    戻り値は (対象予約数, 送信処理した通知数)。
+    """
+    if not settings.ENABLE_RESERVATION_NOTIFICATIONS:
+        logger.info("メール通知が無効になっています")
+        return 0, 0
+
+    if target_date is None:
+        target_date = timezone.localdate() + timedelta(days=1)
+
+    count = enqueue_reminders(target_date, chunk_size=chunk_size)
+    processed = 0
+    if send:
+        try:
+            # 1回の実行では1本のメール接続を使い回す
+            while True:
+                batch = process_batch(batch_size=batch_size)
+                processed += batch
+                if not batch:
+                    break
+        finally:
+            get_sender().close()
+    logger.info(f"{target_date} のリマインド: 予約{count}件 / 通知{processed}件を処理しました")
+    return count, processed
@@ -0,0 +1,93 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+import threading
+
+# テナントID → コンパイル済みスケジュール（プロセス内メモ化）
+_schedules = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class TenantSchedule:
+    """テナントの営業設定を事前計算した読み取り専用オブジェクト"""
+    tenant_id: int
+    updated_at: datetime
+    start_time: object
+    end_time: object
+    slots: tuple
+    open_weekdays: int  # 月曜=bit0 ... 日曜=bit6
+    advance_hours: int
+    slot_duration: int
+    slot_indexes: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def layout_key(self):
+        """時間枠の並びを表すキー（枠番号の意味が変わるとキーも変わる）"""
+        return f"{self.start_time:%H%M}-{self.end_time:%H%M}-{self.slot_duration}"
+
+    def is_open(self, day):
+        """営業日判定"""
+        return bool(self.open_weekdays >> day.weekday() & 1)
+
+    def slot_index(self, slot_time):
+        """時間枠の番号を返す（枠に一致しない場合はNone）"""
+        return self.slot_indexes.get(slot_time)
+
+    def slot_datetimes(self, target_date):
+        """指定日の時間枠の開始日時を返す"""
+        return [datetime.combine(target_date, slot) for slot in self.slots]
+
+def compile_schedule(tenant):
+    """Tenantの設定からTenantScheduleを組み立てる"""
+    slots = []
+    base = date(2000, 1, 1)
+    current = datetime.combine(base, tenant.start_time)
+    end = datetime.combine(base, tenant.end_time)
+    step = timedelta(minutes=tenant.slot_duration)
+    while current < end:
+        slots.append(current.time())
+        current += step
+
+    open_weekdays = 0
+    for weekday, is_open in tenant.get_open_days():
+        if is_open:
+            open_weekdays |= 1 << weekday
+
+    return TenantSchedule(
+        tenant_id=tenant.pk,
+        updated_at=tenant.updated_at,
+        start_time=tenant.start_time,
+        end_time=tenant.end_time,
+        slots=tuple(slots),
+        open_weekdays=open_weekdays,
+        advance_hours=tenant.advance_hours,
+        slot_duration=tenant.slot_duration,
+        slot_indexes={slot: index for index, slot in enumerate(slots)},
+    )
+
+def get_schedule(tenant):
+    """テナントのスケジュールを返す（テナントIDと更新日時でメモ化）"""
+    if tenant.pk is None:
+        return compile_schedule(tenant)
+
+    schedule = _schedules.get(tenant.pk)
+    if schedule is not None and schedule.updated_at == tenant.updated_at:
+        return schedule
+
+    schedule = compile_schedule(tenant)
+    with _lock:
+        _schedules[tenant.pk] = schedule
+    return schedule
+
+def invalidate_schedule(tenant_id):
+    """メモ化済みスケジュールを破棄（Tenant.saveから呼ばれる）"""
+    with _lock:
+        _schedules.pop(tenant_id, None)
+
+def get_tenant_time_slots(tenant):
+    """テナント設定に基づく時間枠"""
+    return list(get_schedule(tenant).slots)
+
+def is_open_day(day, tenant):
+    """営業日判定"""
+    return get_schedule(tenant).is_open(day)
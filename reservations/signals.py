@@ -1,37 +1,111 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Reservation
-from .utils import send_reservation_confirmation_email, send_business_notification_email
+from .booking import in_bulk_changes
+from .models import CustomUser, Menu, Reservation, Tenant
+from .occupancy import schedule_occupancy_refresh
+from .stats import schedule_slot_count_refresh, schedule_stat_update
+from .tenants import schedule_tenant_record_bump
+from .versioning import schedule_directory_bump, schedule_version_bump
+from .notifications import enqueue_reservation_emails
 import logging
 
 logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Reservation)
-def send_reservation_emails(sender, instance, created, **kwargs):
+def enqueue_reservation_emails_on_create(sender, instance, created, **kwargs):
     """
-    予約が作成された時に自動でメール通知を送信
+    予約が作成された時にメール通知を通知キューに積む
+    （予約と同じトランザクションで保存し、送信はコミット後に行う）
     """
     if created:  # 新規作成時のみ
         # ブロック予約の場合はメール送信をスキップ
         if instance.customer_name == 'BLOCKED':
             logger.info(f"予約ID {instance.id}: ブロック予約のためメール送信をスキップしました")
             return
-            
-        try:
-            # 予約者への確認メール送信
-            confirmation_sent = send_reservation_confirmation_email(instance)
-            
-            # 事業者への通知メール送信
-            notification_sent = send_business_notification_email(instance)
-            
-            if confirmation_sent and notification_sent:
-                logger.info(f"予約ID {instance.id}: 両方のメール送信が完了しました")
-            elif confirmation_sent:
-                logger.warning(f"予約ID {instance.id}: 予約者メールのみ送信完了、事業者メール送信失敗")
-            elif notification_sent:
-                logger.warning(f"予約ID {instance.id}: 事業者メールのみ送信完了、予約者メール送信失敗")
-            else:
-                logger.error(f"予約ID {instance.id}: 両方のメール送信が失敗しました")
-                
-        except Exception as e:
-            logger.error(f"予約ID {instance.id}: メール送信処理でエラーが発生しました: {e}")
+        
+        enqueue_reservation_emails(instance)
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_reservation_date(sender, instance, **kwargs):
+    """予約の更新時、変更前の日付を占有ビットマップ更新用に保持"""
+    instance._previous_date = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_date = Reservation.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+@receiver(post_save, sender=Reservation)
+def refresh_occupancy_on_save(sender, instance, **kwargs):
+    """予約の作成・更新時に占有ビットマップを更新"""
+    if in_bulk_changes():
+        return
+    schedule_occupancy_refresh(instance.tenant, instance.date)
+    previous_date = getattr(instance, '_previous_date', None)
+    if previous_date and previous_date != instance.date:
+        schedule_occupancy_refresh(instance.tenant, previous_date)
+
+@receiver(post_delete, sender=Reservation)
+def refresh_occupancy_on_delete(sender, instance, **kwargs):
+    """予約の削除時に占有ビットマップを更新"""
+    if in_bulk_changes():
+        return
+    schedule_occupancy_refresh(instance.tenant, instance.date)
+
+@receiver(post_save, sender=Reservation)
+def update_daily_stat_on_save(sender, instance, created, **kwargs):
+    """予約の作成・日付変更時に日別集計を更新"""
+    if in_bulk_changes():
+        return
+    previous_date = getattr(instance, '_previous_date', None)
+    if created:
+        schedule_stat_update(instance.tenant, instance.date)
+    elif previous_date and previous_date != instance.date:
+        schedule_stat_update(instance.tenant, previous_date)
+        schedule_stat_update(instance.tenant, instance.date)
+
+@receiver(post_delete, sender=Reservation)
+def update_daily_stat_on_delete(sender, instance, **kwargs):
+    """予約の削除時に日別集計を更新"""
+    if in_bulk_changes():
+        return
+    schedule_stat_update(instance.tenant, instance.date)
+
+@receiver(pre_save, sender=Tenant)
+def remember_previous_tenant_slug(sender, instance, **kwargs):
+    """テナントの更新時、変更前のslugをバージョン更新用に保持"""
+    instance._previous_slug = None
+    if instance.pk and not instance._state.adding:
+        instance._previous_slug = Tenant.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def bump_version_on_tenant_write(sender, instance, **kwargs):
+    """テナントの書き込み時にバージョンを進める"""
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    for slug in slugs - {None}:
+        schedule_version_bump(slug)
+        schedule_tenant_record_bump(slug)
+    schedule_directory_bump()
+
+@receiver(post_save, sender=Tenant)
+def refresh_slot_counts_on_tenant_update(sender, instance, created, **kwargs):
+    """営業設定が変わった可能性があるため、今日以降の日別集計の枠数を作り直す"""
+    if not created:
+        schedule_slot_count_refresh(instance)
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def bump_version_on_tenant_data_write(sender, instance, **kwargs):
+    """メニュー・予約の書き込み時に所属テナントのバージョンを進める"""
+    if in_bulk_changes():
+        return
+    schedule_version_bump(instance.tenant.slug)
+
+@receiver(post_save, sender=CustomUser)
+def bump_tenant_record_on_owner_write(sender, instance, update_fields=None, **kwargs):
+    """オーナー情報の変更時、テナントのプロセス内キャッシュを無効化"""
+    # ログイン時の last_login 更新だけでは無効化しない
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    for slug in Tenant.objects.filter(owner=instance).values_list('slug', flat=True):
+        schedule_tenant_record_bump(slug)
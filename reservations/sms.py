@@ -0,0 +1,111 @@
+import json
+import sys
+import threading
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 既定のSMS送信バックエンド（設定 SMS_BACKEND で切り替え）
+DEFAULT_SMS_BACKEND = 'reservations.sms.TwilioBackend'
+
+# LocmemBackendで送信したSMS（テスト用）
+outbox = []
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+class BaseSMSBackend:
+    """SMS送信バックエンドの基底クラス（Djangoのメールバックエンドと同じ考え方）"""
+
+    def send(self, to_number, message):
+        """SMSを1件送信する。失敗時は例外を送出する"""
+        raise NotImplementedError
+
+
+class TwilioBackend(BaseSMSBackend):
+    """Twilio経由で送信する
+
+    twilio は最初の送信時にだけ読み込み、クライアントとHTTPセッションは
+    プロセス内で1つを使い回す。
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout or getattr(settings, 'SMS_TIMEOUT', 10)
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get_client(self):
+        with self._lock:
+            if self._client is None:
+                from twilio.http.http_client import TwilioHttpClient
+                from twilio.rest import Client
+                self._client = Client(
+                    settings.TWILIO_ACCOUNT_SID,
+                    settings.TWILIO_AUTH_TOKEN,
+                    http_client=TwilioHttpClient(pool_connections=True, timeout=self.timeout),
+                )
+            return self._client
+
+    def send(self, to_number, message):
+        self.get_client().messages.create(
+            body=message,
+            from_=settings.TWILIO_FROM_NUMBER,
+            to=to_number,
+        )
+
+
+class ConsoleBackend(BaseSMSBackend):
+    """標準出力に書き出す（開発用）"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send(self, to_number, message):
+        with self._lock:
+            self.stream.write(f"SMS to {to_number}\n{message}\n{'-' * 40}\n")
+            self.stream.flush()
+
+
+class LocmemBackend(BaseSMSBackend):
+    """モジュール変数 outbox に溜める（テスト用）"""
+
+    def send(self, to_number, message):
+        outbox.append({'to': to_number, 'message': message})
+
+
+class FileBackend(BaseSMSBackend):
+    """SMS_FILE_PATH のファイルにJSON Linesで追記する（開発用）"""
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path or settings.SMS_FILE_PATH
+        self._lock = threading.Lock()
+
+    def send(self, to_number, message):
+        line = json.dumps({
+            'to': to_number,
+            'message': message,
+            'sent_at': timezone.now().isoformat(),
+        }, ensure_ascii=False)
+        with self._lock, open(self.file_path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def get_backend(backend=None):
+    """設定のバックエンドを返す（プロセス内で1インスタンスを共有）"""
+    path = backend or getattr(settings, 'SMS_BACKEND', DEFAULT_SMS_BACKEND)
+    with _backends_lock:
+        instance = _backends.get(path)
+        if instance is None:
+            instance = import_string(path)()
+            _backends[path] = instance
+    return instance
+
+def send_sms(to_number, message):
+    """SMSを送信（失敗時は例外。通知キューから呼ばれ、失敗分は再送される）"""
+    get_backend().send(to_number, message)
+    logger.info(f"SMSを送信しました: {to_number}")
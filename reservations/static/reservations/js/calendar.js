@@ -0,0 +1,329 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // --- 要素の取得 ---
+    const calendarTitle = document.getElementById('calendar-title');
+    const calendarBody = document.getElementById('calendar-body');
+    const prevMonthBtn = document.getElementById('prev-month');
+    const nextMonthBtn = document.getElementById('next-month');
+    const bookingModal = document.getElementById('booking-modal');
+    const modalDate = document.getElementById('modal-date');
+    const timeSlotsContainer = document.getElementById('time-slots');
+    const closeModalBtn = document.getElementById('close-modal');
+
+    // --- 初期設定 ---
+    const today = new Date();
+    today.setHours(0, 0, 0, 0); // 時刻をリセットして日付のみで比較
+    let currentYear = today.getFullYear();
+    let currentMonth = today.getMonth(); // 0-11 (1月が0)
+
+    // --- テナント情報の取得 ---
+    const tenantData = JSON.parse(document.getElementById('tenant-data').textContent);
+
+    // --- 祝日リスト（手動で定義） ---
+    const holidays = [
+        '2025-01-01', '2025-01-13', '2025-02-11', '2025-02-23', '2025-03-20',
+        '2025-04-29', '2025-05-03', '2025-05-04', '2025-05-05', '2025-05-06',
+        '2025-07-21', '2025-08-11', '2025-09-15', '2025-09-23', '2025-10-13',
+        '2025-11-03', '2025-11-23', '2025-12-23'
+    ];
+
+    /**
+     * 営業日判定関数
+     * @param {Date} date - 判定する日付
+     * @returns {boolean} - 営業日かどうか
+     */
+    function isOpenDay(date) {
+        const dayOfWeek = date.getDay(); // 0=日曜, 1=月曜, ..., 6=土曜
+        const openDaysArray = [
+            tenantData.openDays.sunday,
+            tenantData.openDays.monday,
+            tenantData.openDays.tuesday,
+            tenantData.openDays.wednesday,
+            tenantData.openDays.thursday,
+            tenantData.openDays.friday,
+            tenantData.openDays.saturday
+        ];
+        return openDaysArray[dayOfWeek];
+    }
+
+    /**
+     * カレンダーを生成して表示する関数
+     * @param {number} year - 年
+     * @param {number} month - 月 (0-11)
+     */
+    function renderCalendar(year, month) {
+        // カレンダーのタイトルを更新
+        calendarTitle.textContent = `${year}年 ${month + 1}月`;
+        calendarBody.innerHTML = ''; // 中身をリセット
+
+        // 月の初日と最終日を取得
+        const firstDay = new Date(year, month, 1);
+        const lastDay = new Date(year, month + 1, 0);
+
+        let date = 1;
+        for (let i = 0; i < 6; i++) { // 最大6週間
+            const row = document.createElement('tr');
+            
+            for (let j = 0; j < 7; j++) { // 曜日（日〜土）
+                const cell = document.createElement('td');
+
+                if (i === 0 && j < firstDay.getDay()) {
+                    // 月の始まる前の空セル
+                    cell.classList.add('disabled');
+                } else if (date > lastDay.getDate()) {
+                    // 月の終わった後の空セル
+                    cell.classList.add('disabled');
+                } else {
+                    // 日付セル
+                    const currentDate = new Date(year, month, date);
+                    const dateStr = `${year}-${String(month + 1).padStart(2, '0')}-${String(date).padStart(2, '0')}`;
+                    
+                    cell.innerHTML = `<div class="day">${date}</div>`;
+                    cell.dataset.date = dateStr;
+                    cell.classList.add('date-cell');
+
+                    // --- クラスの追加 ---
+                    // 過去の日付や営業日でない日は無効に
+                    if (currentDate < today || !isOpenDay(currentDate)) {
+                        cell.classList.add('disabled');
+                    }
+                    // 土日祝日の判定
+                    const dayOfWeek = currentDate.getDay();
+                    if (dayOfWeek === 0) cell.classList.add('sunday');
+                    if (dayOfWeek === 6) cell.classList.add('saturday');
+                    if (holidays.includes(dateStr)) cell.classList.add('holiday');
+                    
+                    // 今日の日付をハイライト
+                    if (currentDate.getTime() === today.getTime()) {
+                        cell.classList.add('today');
+                    }
+
+                    date++;
+                }
+                row.appendChild(cell);
+            }
+            calendarBody.appendChild(row);
+            if (date > lastDay.getDate()) break; // 月の最終日を超えたらループを抜ける
+        }
+
+        loadMonthAvailability(year, month);
+    }
+
+    // 期間APIで取得した日ごとの空き状況（'YYYY-MM-DD' → 日データ）
+    const availabilityByDate = {};
+
+    /**
+     * 表示中の月の空き状況をまとめて取得し、満席日をグレーアウトする関数
+     * @param {number} year - 年
+     * @param {number} month - 月 (0-11)
+     */
+    async function loadMonthAvailability(year, month) {
+        const pad = (n) => String(n).padStart(2, '0');
+        const lastDate = new Date(year, month + 1, 0).getDate();
+        const fromStr = `${year}-${pad(month + 1)}-01`;
+        const toStr = `${year}-${pad(month + 1)}-${pad(lastDate)}`;
+
+        try {
+            const response = await fetch(`/tenant/${tenantData.slug}/api/availability/?from=${fromStr}&to=${toStr}`);
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            Object.assign(availabilityByDate, data.days);
+
+            calendarBody.querySelectorAll('.date-cell').forEach(cell => {
+                const day = data.days[cell.dataset.date];
+                if (day && day.is_open && day.free_count === 0) {
+                    cell.classList.add('disabled', 'full-day');
+                }
+            });
+        } catch (error) {
+            // 取得できない場合は日付クリック時の個別取得にフォールバック
+            console.error('Error fetching availability:', error);
+        }
+    }
+
+    /**
+     * 予約状況を取得する関数（月単位で取得済みならそれを使う）
+     * @param {string} dateStr - 'YYYY-MM-DD'形式の日付文字列
+     */
+    async function fetchDaySlots(dateStr) {
+        if (availabilityByDate[dateStr]) {
+            return availabilityByDate[dateStr].slots;
+        }
+        const response = await fetch(`/tenant/${tenantData.slug}/api/slots/?date=${dateStr}`);
+        if (!response.ok) {
+            throw new Error('予約情報の取得に失敗しました');
+        }
+        const data = await response.json();
+        return data.slots;
+    }
+    
+    /**
+     * 指定された日付の予約可能時間を表示する関数
+     * @param {string} dateStr - 'YYYY-MM-DD'形式の日付文字列
+     */
+    async function showBookingTimes(dateStr) {
+        modalDate.textContent = dateStr;
+        timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px;">読み込み中...</div>';
+
+        try {
+            // サーバーから予約状況を取得
+            const slots = await fetchDaySlots(dateStr);
+            timeSlotsContainer.innerHTML = ''; // 中身をリセット
+
+            if (slots && slots.length > 0) {
+                slots.forEach(slot => {
+                    const timeSlot = document.createElement('div');
+                    timeSlot.textContent = slot.time;
+                    timeSlot.classList.add('time-slot');
+                    
+                    if (slot.is_reserved) {
+                        timeSlot.classList.add('unavailable');
+                    } else if (slot.is_available) {
+                        timeSlot.classList.add('available');
+                        timeSlot.dataset.datetime = `${dateStr} ${slot.time}`;
+                    } else {
+                        timeSlot.classList.add('unavailable');
+                    }
+                    timeSlotsContainer.appendChild(timeSlot);
+                });
+            } else {
+                timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px;">この日は予約枠がありません</div>';
+            }
+        } catch (error) {
+            console.error('Error fetching slots:', error);
+            timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px; color: red;">エラーが発生しました</div>';
+        }
+
+        bookingModal.style.display = 'flex'; // モーダルを表示
+    }
+
+
+    // --- イベントリスナー ---
+
+    // 前月ボタン
+    prevMonthBtn.addEventListener('click', () => {
+        currentMonth--;
+        if (currentMonth < 0) {
+            currentMonth = 11;
+            currentYear--;
+        }
+        renderCalendar(currentYear, currentMonth);
+    });
+
+    // 次月ボタン
+    nextMonthBtn.addEventListener('click', () => {
+        currentMonth++;
+        if (currentMonth > 11) {
+            currentMonth = 0;
+            currentYear++;
+        }
+        renderCalendar(currentYear, currentMonth);
+    });
+
+    // 日付セルクリック（イベント委任）
+    calendarBody.addEventListener('click', (e) => {
+        const cell = e.target.closest('.date-cell');
+        if (cell && !cell.classList.contains('disabled')) {
+            const dateStr = cell.dataset.date;
+            showBookingTimes(dateStr);
+        }
+    });
+
+    // モーダルを閉じる
+    closeModalBtn.addEventListener('click', () => {
+        bookingModal.style.display = 'none';
+    });
+    // モーダルの背景クリックで閉じる
+    bookingModal.addEventListener('click', (e) => {
+        if (e.target === bookingModal) {
+            bookingModal.style.display = 'none';
+        }
+    });
+
+    // 時間帯クリック
+    timeSlotsContainer.addEventListener('click', (e) => {
+        const slot = e.target.closest('.time-slot.available');
+        if (slot) {
+            const selectedDateTime = slot.dataset.datetime;
+            const [date, time] = selectedDateTime.split(' ');
+            
+            // 時間選択モーダルを閉じる
+            bookingModal.style.display = 'none';
+            
+            // 予約フォームモーダルを開く
+            openReservationModal(date, time);
+        }
+    });
+
+    // 予約フォームモーダル関連の関数
+    const reservationModal = document.getElementById('reservation-modal');
+    const reservationForm = document.getElementById('reservationForm');
+
+    window.openReservationModal = function(date, time) {
+        document.getElementById('reservationDate').value = date;
+        document.getElementById('reservationTime').value = time;
+        
+        const dateObj = new Date(date + 'T' + time);
+        const options = { year: 'numeric', month: 'long', day: 'numeric', weekday: 'long', hour: '2-digit', minute: '2-digit' };
+        document.getElementById('reservationDateTime').textContent = dateObj.toLocaleDateString('ja-JP', options);
+        
+        reservationModal.style.display = 'flex';
+        document.body.style.overflow = 'hidden';
+    };
+
+    window.closeReservationModal = function() {
+        reservationModal.style.display = 'none';
+        document.body.style.overflow = 'auto';
+    };
+
+    // 予約フォーム送信処理
+    reservationForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        
+        const submitBtn = this.querySelector('button[type="submit"]');
+        if (submitBtn.disabled) return;
+        
+        const originalText = submitBtn.textContent;
+        submitBtn.disabled = true;
+        submitBtn.textContent = '予約処理中...';
+
+        const form = this;
+        const formData = new FormData(form);
+        const reservedDate = formData.get('date');
+
+        // キャッシュされたページにはトークンがないため、送信の直前に取得する
+        fetch(form.dataset.csrfUrl, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(({ token }) => fetch(form.action, {
+            method: 'POST',
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest',
+                'X-CSRFToken': token
+            },
+            body: formData
+        }))
+        .then(response => response.json().then(data => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            if (ok) {
+                alert('予約が完了しました！');
+                window.location.reload();
+            } else {
+                alert('予約に失敗しました: ' + (data.message || '不明なエラー'));
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('予約処理でエラーが発生しました');
+        })
+        .finally(() => {
+            // 送信の結果で空き状況が変わるため、この日は次に開いたときに取得し直す
+            delete availabilityByDate[reservedDate];
+            submitBtn.disabled = false;
+            submitBtn.textContent = originalText;
+        });
+    });
+
+    // --- 初期表示 ---
+    renderCalendar(currentYear, currentMonth);
+});
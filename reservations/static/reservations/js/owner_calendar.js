@@ -0,0 +1,526 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // --- 要素の取得 ---
+    const calendarTitle = document.getElementById('calendar-title');
+    const calendarBody = document.getElementById('calendar-body'); 
+    const prevMonthBtn = document.getElementById('prev-month');
+    const nextMonthBtn = document.getElementById('next-month');
+
+    // --- 初期設定 ---
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+    let currentYear = today.getFullYear();
+    let currentMonth = today.getMonth();
+
+    // --- テナント情報 ---
+    const tenantData = JSON.parse(document.getElementById('tenant-data').textContent);
+
+    /**
+     * 営業日判定関数
+     */
+    function isOpenDay(date) {
+        const dayOfWeek = date.getDay();
+        const openDaysArray = [
+            tenantData.openDays.sunday,
+            tenantData.openDays.monday,
+            tenantData.openDays.tuesday,
+            tenantData.openDays.wednesday,
+            tenantData.openDays.thursday,
+            tenantData.openDays.friday,
+            tenantData.openDays.saturday
+        ];
+        return openDaysArray[dayOfWeek];
+    }
+
+    /**
+     * カレンダーを生成して表示する関数
+     */
+    function renderCalendar(year, month) {
+        calendarTitle.textContent = `${year}年 ${month + 1}月`;
+        calendarBody.innerHTML = '';
+
+        const firstDay = new Date(year, month, 1);
+        const lastDay = new Date(year, month + 1, 0);
+
+        let date = 1;
+        for (let i = 0; i < 6; i++) {
+            const row = document.createElement('tr');
+            
+            for (let j = 0; j < 7; j++) {
+                const cell = document.createElement('td');
+
+                if (i === 0 && j < firstDay.getDay()) {
+                    cell.classList.add('disabled');
+                } else if (date > lastDay.getDate()) {
+                    cell.classList.add('disabled');
+                } else {
+                    const currentDate = new Date(year, month, date);
+                    const dateStr = `${year}-${String(month + 1).padStart(2, '0')}-${String(date).padStart(2, '0')}`;
+                    
+                    cell.innerHTML = `
+                        <div class="date-number">${date}</div>
+                        <div class="reservation-count" data-date="${dateStr}">0</div>
+                    `;
+                    cell.dataset.date = dateStr;
+                    cell.classList.add('date-cell');
+
+                    // 営業日・休業日の判定
+                    if (isOpenDay(currentDate)) {
+                        cell.classList.add('open-day');
+                    } else {
+                        cell.classList.add('closed-day');
+                    }
+                    
+                    // 今日の日付をハイライト
+                    if (currentDate.getTime() === today.getTime()) {
+                        cell.classList.add('today');
+                    }
+
+                    date++;
+                }
+                row.appendChild(cell);
+            }
+            calendarBody.appendChild(row);
+            if (date > lastDay.getDate()) break;
+        }
+
+        // 予約件数を読み込み
+        loadReservationCounts(year, month);
+    }
+
+    /**
+     * 月の予約件数を取得して表示
+     */
+    async function loadReservationCounts(year, month) {
+        try {
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/reservation-counts/?year=${year}&month=${month + 1}`);
+            if (response.ok) {
+                const data = await response.json();
+                
+                // 各日付の予約件数を更新
+                Object.keys(data.counts).forEach(dateStr => {
+                    const count = data.counts[dateStr];
+                    const countElement = document.querySelector(`.reservation-count[data-date="${dateStr}"]`);
+                    if (countElement) {
+                        countElement.textContent = count;
+                        if (count > 0) {
+                            countElement.classList.add('has-reservations');
+                        }
+                    }
+                });
+            }
+        } catch (error) {
+            console.error('予約件数の取得に失敗しました:', error);
+        }
+    }
+
+    // スロットAPIで受け取った予約詳細（予約ID → 詳細）
+    const reservationDetails = new Map();
+
+    /**
+     * 時間選択モーダルを表示
+     */
+    async function showTimeSlots(dateStr) {
+        document.getElementById('modal-date').textContent = dateStr;
+        const timeSlotsContainer = document.getElementById('time-slots');
+        timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px;">読み込み中...</div>';
+
+        try {
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/slots/?date=${dateStr}&include=detail`);
+            if (!response.ok) {
+                throw new Error('予約情報の取得に失敗しました');
+            }
+            
+            const data = await response.json();
+            timeSlotsContainer.innerHTML = '';
+            reservationDetails.clear();
+
+            if (data.slots && data.slots.length > 0) {
+                data.slots.forEach(slot => {
+                    const timeSlot = document.createElement('div');
+                    timeSlot.textContent = slot.time;
+                    timeSlot.classList.add('time-slot');
+                    
+                    if (slot.is_reserved) {
+                        timeSlot.classList.add('reserved');
+                        timeSlot.dataset.reservationId = slot.reservation_id;
+                        if (slot.detail) {
+                            reservationDetails.set(String(slot.reservation_id), slot.detail);
+                        }
+                    } else if (slot.is_available) {
+                        timeSlot.classList.add('available');
+                    } else {
+                        timeSlot.classList.add('blocked');
+                    }
+                    
+                    timeSlot.dataset.date = dateStr;
+                    timeSlot.dataset.time = slot.time;
+                    timeSlotsContainer.appendChild(timeSlot);
+                });
+            } else {
+                timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px;">この日は予約枠がありません</div>';
+            }
+        } catch (error) {
+            console.error('Error fetching slots:', error);
+            timeSlotsContainer.innerHTML = '<div style="text-align: center; padding: 20px; color: red;">エラーが発生しました</div>';
+        }
+
+        document.getElementById('time-modal').style.display = 'flex';
+    }
+
+    // --- イベントリスナー ---
+    
+    // 前月・次月ボタン
+    prevMonthBtn.addEventListener('click', () => {
+        currentMonth--;
+        if (currentMonth < 0) {
+            currentMonth = 11;
+            currentYear--;
+        }
+        renderCalendar(currentYear, currentMonth);
+    });
+
+    nextMonthBtn.addEventListener('click', () => {
+        currentMonth++;
+        if (currentMonth > 11) {
+            currentMonth = 0;
+            currentYear++;
+        }
+        renderCalendar(currentYear, currentMonth);
+    });
+
+    // 日付セルクリック
+    calendarBody.addEventListener('click', (e) => {
+        const cell = e.target.closest('.date-cell');
+        if (cell && !cell.classList.contains('disabled') && !cell.classList.contains('closed-day')) {
+            const dateStr = cell.dataset.date;
+            showTimeSlots(dateStr);
+        }
+    });
+
+    // 時間スロットクリック
+    document.getElementById('time-slots').addEventListener('click', (e) => {
+        const slot = e.target.closest('.time-slot');
+        if (slot) {
+            const date = slot.dataset.date;
+            const time = slot.dataset.time;
+            
+            closeTimeModal();
+            
+            if (slot.classList.contains('reserved')) {
+                // 予約済み → 予約詳細モーダル
+                showReservationDetail(slot.dataset.reservationId);
+            } else if (slot.classList.contains('available')) {
+                // 空き時間 → アクションモーダル
+                showActionModal(date, time);
+            }
+        }
+    });
+
+    // モーダル関数
+    window.closeTimeModal = function() {
+        document.getElementById('time-modal').style.display = 'none';
+    };
+
+    window.closeReservationDetailModal = function() {
+        document.getElementById('reservation-detail-modal').style.display = 'none';
+    };
+
+    window.closeActionModal = function() {
+        document.getElementById('action-modal').style.display = 'none';
+    };
+
+    window.showReservationDetail = async function(reservationId) {
+        try {
+            // スロット取得時に受け取った詳細があれば再取得しない
+            let reservation = reservationDetails.get(String(reservationId));
+            if (!reservation) {
+                const response = await fetch(`/owner/tenant/${tenantData.slug}/api/reservation/${reservationId}/`);
+                if (!response.ok) {
+                    throw new Error('予約詳細の取得に失敗しました');
+                }
+                reservation = await response.json();
+            }
+            
+            // 予約詳細を表示
+            document.getElementById('reservation-details').innerHTML = `
+                <div style="text-align: left; margin: 20px 0;">
+                    <p><strong>お客様名:</strong> ${reservation.customer_name}</p>
+                    <p><strong>電話番号:</strong> ${reservation.customer_phone}</p>
+                    <p><strong>メールアドレス:</strong> ${reservation.customer_email || '未設定'}</p>
+                    <p><strong>予約日時:</strong> ${reservation.date} ${reservation.time_slot}</p>
+                    <p><strong>メニュー:</strong> ${reservation.menu_name}</p>
+                    ${reservation.menu_price > 0 ? `<p><strong>料金:</strong> ¥${reservation.menu_price.toLocaleString()}</p>` : ''}
+                    <p><strong>予約作成日:</strong> ${reservation.created_at}</p>
+                </div>
+            `;
+            
+            // 削除ボタンに予約IDを設定
+            document.querySelector('#reservation-detail-modal .btn-danger').onclick = () => deleteReservation(reservationId);
+            
+            document.getElementById('reservation-detail-modal').style.display = 'flex';
+        } catch (error) {
+            alert('予約詳細の取得に失敗しました: ' + error.message);
+        }
+    };
+
+    window.showActionModal = function(date, time) {
+        document.getElementById('action-datetime').textContent = `${date} ${time}`;
+        document.getElementById('action-modal').style.display = 'flex';
+    };
+
+    window.deleteReservation = async function(reservationId) {
+        if (!confirm('この予約を削除してもよろしいですか？')) {
+            return;
+        }
+        
+        try {
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/reservation/${reservationId}/delete/`, {
+                method: 'DELETE',
+                headers: {
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+                    'Content-Type': 'application/json'
+                }
+            });
+            
+            const result = await response.json();
+            
+            if (response.ok) {
+                alert(result.message);
+                closeReservationDetailModal();
+                // カレンダーを再読み込み
+                renderCalendar(currentYear, currentMonth);
+            } else {
+                alert('削除に失敗しました: ' + result.error);
+            }
+        } catch (error) {
+            alert('削除処理でエラーが発生しました: ' + error.message);
+        }
+    };
+
+    window.openCreateReservationModal = function() {
+        closeActionModal();
+        
+        // 選択された日時を表示
+        const dateTime = document.getElementById('action-datetime').textContent;
+        document.getElementById('reservation-datetime-display').textContent = dateTime;
+        
+        // 隠しフィールドに値を設定
+        const [date, time] = dateTime.split(' ');
+        document.getElementById('reservation-date').value = date;
+        document.getElementById('reservation-time').value = time;
+        
+        // フォームをリセット
+        document.getElementById('createReservationForm').reset();
+        document.getElementById('reservation-date').value = date;
+        document.getElementById('reservation-time').value = time;
+        
+        document.getElementById('create-reservation-modal').style.display = 'flex';
+    };
+
+    window.closeCreateReservationModal = function() {
+        document.getElementById('create-reservation-modal').style.display = 'none';
+    };
+
+    // ブロック予約のトグル機能
+    window.toggleBlockReservation = function() {
+        const isBlock = document.getElementById('is-block-reservation').checked;
+        const submitBtn = document.getElementById('create-reservation-submit');
+        
+        // 顧客情報フィールドの表示/非表示
+        const customerNameField = document.getElementById('proxy-customer-name').parentNode;
+        const customerPhoneField = document.getElementById('proxy-customer-phone').parentNode;
+        const customerEmailField = document.getElementById('proxy-customer-email').parentNode;
+        const menuField = document.getElementById('proxy-menu').parentNode;
+        
+        if (isBlock) {
+            // ブロック予約の場合は顧客情報を非表示
+            customerNameField.style.display = 'none';
+            customerPhoneField.style.display = 'none';
+            customerEmailField.style.display = 'none';
+            menuField.style.display = 'none';
+            
+            // 必須項目を解除
+            document.getElementById('proxy-customer-name').required = false;
+            document.getElementById('proxy-customer-phone').required = false;
+            
+            // ボタンテキストを変更
+            submitBtn.textContent = '時間をブロック';
+            
+            // メール送信なしを自動チェック
+            document.getElementById('no-email-notification').checked = true;
+        } else {
+            // 通常予約の場合は顧客情報を表示
+            customerNameField.style.display = 'block';
+            customerPhoneField.style.display = 'block';
+            customerEmailField.style.display = 'block';
+            menuField.style.display = 'block';
+            
+            // 必須項目を復活
+            document.getElementById('proxy-customer-name').required = true;
+            document.getElementById('proxy-customer-phone').required = true;
+            
+            // ボタンテキストを元に戻す
+            submitBtn.textContent = '予約を作成';
+            
+            // メール送信なしのチェックを解除
+            document.getElementById('no-email-notification').checked = false;
+        }
+    };
+
+    // 代理予約フォーム送信処理
+    document.getElementById('createReservationForm').addEventListener('submit', async function(e) {
+        e.preventDefault();
+        
+        const submitBtn = this.querySelector('button[type="submit"]');
+        const originalText = submitBtn.textContent;
+        submitBtn.disabled = true;
+        submitBtn.textContent = originalText.includes('ブロック') ? 'ブロック中...' : '作成中...';
+        
+        try {
+            const formData = new FormData(this);
+            const data = Object.fromEntries(formData.entries());
+            
+            // ブロック予約の場合は固定値を設定
+            const isBlock = document.getElementById('is-block-reservation').checked;
+            if (isBlock) {
+                data.customer_name = 'BLOCKED';
+                data.customer_phone = '0000000000';
+                data.customer_email = '';
+                data.menu_id = '';
+                data.is_block = 'true';
+            }
+            
+            // メール送信無効フラグを追加
+            data.no_email = document.getElementById('no-email-notification').checked ? 'true' : 'false';
+            
+            // デバッグログ
+            console.log('Reservation data:', {
+                isBlock: isBlock,
+                noEmail: data.no_email,
+                customerName: data.customer_name
+            });
+            
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/reservation/create/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': formData.get('csrfmiddlewaretoken')
+                },
+                body: JSON.stringify(data)
+            });
+            
+            const result = await response.json();
+            
+            if (response.ok) {
+                alert(result.message);
+                closeCreateReservationModal();
+                renderCalendar(currentYear, currentMonth);
+            } else {
+                alert('予約作成に失敗しました: ' + result.error);
+            }
+        } catch (error) {
+            alert('エラーが発生しました: ' + error.message);
+        } finally {
+            submitBtn.disabled = false;
+            submitBtn.textContent = originalText;
+        }
+    });
+
+    window.blockTimeSlot = async function() {
+        const dateTime = document.getElementById('action-datetime').textContent;
+        
+        if (!confirm(`${dateTime} をブロック（予約不可）にしますか？`)) {
+            return;
+        }
+        
+        try {
+            const [date, time] = dateTime.split(' ');
+            
+            // ダミー予約として「BLOCKED」というお客様名で予約作成（メール送信なし）
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/reservation/create/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify({
+                    date: date,
+                    time_slot: time,
+                    customer_name: 'BLOCKED',
+                    customer_phone: '0000000000',
+                    customer_email: '',
+                    is_block: 'true',
+                    no_email: 'true'
+                })
+            });
+            
+            const result = await response.json();
+            
+            if (response.ok) {
+                alert(`${dateTime} をブロックしました`);
+                closeActionModal();
+                renderCalendar(currentYear, currentMonth);
+            } else {
+                alert('ブロックに失敗しました: ' + result.error);
+            }
+        } catch (error) {
+            alert('エラーが発生しました: ' + error.message);
+        }
+    };
+
+    // --- 期間ブロック ---
+    window.openRangeBlockModal = function() {
+        document.getElementById('range-block-modal').style.display = 'flex';
+    };
+
+    window.closeRangeBlockModal = function() {
+        document.getElementById('range-block-modal').style.display = 'none';
+    };
+
+    window.submitRangeBlock = async function(action) {
+        const startDate = document.getElementById('range-start-date').value;
+        if (!startDate) {
+            alert('開始日を入力してください');
+            return;
+        }
+        const data = {
+            action: action,
+            start_date: startDate,
+            end_date: document.getElementById('range-end-date').value || startDate,
+            start_time: document.getElementById('range-start-time').value,
+            end_time: document.getElementById('range-end-time').value
+        };
+        const weekdays = Array.from(document.querySelectorAll('.range-weekday:checked')).map(el => Number(el.value));
+        if (weekdays.length > 0) {
+            data.weekdays = weekdays;
+        }
+        const label = action === 'block' ? 'ブロック' : 'ブロック解除';
+        if (!confirm(`${data.start_date}〜${data.end_date} の枠を${label}しますか？`)) {
+            return;
+        }
+
+        try {
+            const response = await fetch(`/owner/tenant/${tenantData.slug}/api/block/`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value
+                },
+                body: JSON.stringify(data)
+            });
+            const result = await response.json();
+            if (response.ok) {
+                alert(result.message);
+                closeRangeBlockModal();
+                renderCalendar(currentYear, currentMonth);
+            } else {
+                alert(`${label}に失敗しました: ` + result.error);
+            }
+        } catch (error) {
+            alert('エラーが発生しました: ' + error.message);
+        }
+    };
+
+    // --- 初期表示 ---
+    renderCalendar(currentYear, currentMonth);
+});
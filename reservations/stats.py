@@ -0,0 +1,110 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.utils import timezone
+from .models import DailyReservationStat, Reservation, Tenant
+from .schedule import get_schedule
+
+
+def day_slot_count(tenant, day):
+    """指定日の予約枠数（休業日は0）"""
+    schedule = get_schedule(tenant)
+    return len(schedule.slots) if schedule.is_open(day) else 0
+
+def build_stat(tenant, day, reservation_count):
+    """予約件数から集計行を組み立てる"""
+    slot_count = day_slot_count(tenant, day)
+    return DailyReservationStat(
+        tenant_id=tenant.pk,
+        date=day,
+        reservation_count=reservation_count,
+        slot_count=slot_count,
+        free_slot_count=max(slot_count - reservation_count, 0),
+        occupancy_ratio=reservation_count / slot_count if slot_count else 0.0,
+    )
+
+def _count_subquery(tenant, day):
+    """指定日のコミット済み予約件数（UPDATE文の中で数えるサブクエリ）"""
+    counts = (
+        Reservation.objects.filter(tenant_id=tenant.pk, date=day)
+        .order_by()
+        .values('tenant')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+def sync_stat(tenant, day):
+    """既存の集計行を予約テーブルの件数で上書きし、更新した行数を返す
+
+    件数は同じUPDATE文の中で数えるため、呼び出しが重なっても行ロックの順に
+    コミット済みの件数が書き込まれ、差分の二重加算が起きない。
+    """
+    count = _count_subquery(tenant, day)
+    return DailyReservationStat.objects.filter(tenant_id=tenant.pk, date=day).update(
+        reservation_count=count,
+        free_slot_count=Greatest(F('slot_count') - count, Value(0)),
+        occupancy_ratio=Case(
+            When(slot_count=0, then=Value(0.0)),
+            default=Cast(count, FloatField()) / F('slot_count'),
+            output_field=FloatField(),
+        ),
+    )
+
+def refresh_stat(tenant, day):
+    """集計行を予約テーブルから作り直す（行がなければ作成）"""
+    if sync_stat(tenant, day):
+        return
+
+    # テナントごと削除された場合は集計も不要
+    if not Tenant.objects.filter(pk=tenant.pk).exists():
+        return
+    reservation_count = Reservation.objects.filter(tenant_id=tenant.pk, date=day).count()
+    try:
+        with transaction.atomic():
+            build_stat(tenant, day, reservation_count).save()
+    except IntegrityError:
+        # 同時に別のリクエストが行を作成した場合は、その行をテーブルの件数で上書きする
+        sync_stat(tenant, day)
+
+def schedule_stat_update(tenant, day):
+    """トランザクションのコミット後に集計行を作り直す
+
+    差分（+1/-1）の加算にすると、行がない日に最初の予約と同時にコミットされた
+    予約が作成時の件数と差分の両方で数えられるため、毎回テーブルから数え直す。
+    """
+    transaction.on_commit(lambda: refresh_stat(tenant, day))
+
+def refresh_slot_counts(tenant, start_date):
+    """営業設定の変更後、start_date以降の集計行の枠数・空き枠数・稼働率を作り直す"""
+    stats = list(DailyReservationStat.objects.filter(tenant_id=tenant.pk, date__gte=start_date))
+    for stat in stats:
+        fresh = build_stat(tenant, stat.date, stat.reservation_count)
+        stat.slot_count = fresh.slot_count
+        stat.free_slot_count = fresh.free_slot_count
+        stat.occupancy_ratio = fresh.occupancy_ratio
+    DailyReservationStat.objects.bulk_update(
+        stats, ['slot_count', 'free_slot_count', 'occupancy_ratio'], batch_size=1000,
+    )
+    return len(stats)
+
+def schedule_slot_count_refresh(tenant):
+    """トランザクションのコミット後に今日以降の集計行の枠数を作り直す"""
+    transaction.on_commit(lambda: refresh_slot_counts(tenant, timezone.localdate()))
+
+def rebuild_daily_stats(tenants, batch_size=1000):
+    """予約テーブルから集計行を作り直す（作成した行数を返す）"""
+    created = 0
+    for tenant in tenants:
+        counts = (
+            Reservation.objects.filter(tenant=tenant)
+            .order_by()
+            .values_list('date')
+            .annotate(count=Count('id'))
+        )
+        stats = [build_stat(tenant, day, count) for day, count in counts]
+        with transaction.atomic():
+            DailyReservationStat.objects.filter(tenant=tenant).delete()
+            DailyReservationStat.objects.bulk_create(stats, batch_size=batch_size)
+        created += len(stats)
+    return created
@@ -0,0 +1,60 @@
+import gzip
+import logging
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+logger = logging.getLogger(__name__)
+
+# 圧縮版を作る拡張子（画像・フォントなど圧縮済みの形式は除く）
+COMPRESS_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.html', '.map')
+# これより小さいファイルは圧縮しない（ヘッダーの方が大きくなる）
+COMPRESS_MIN_SIZE = 256
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ハッシュ付きのファイル名で保存し、gzip・brotliの圧縮版も書き出す
+
+    ファイル名に内容のハッシュが入るため、配信側は長期キャッシュ
+    （Cache-Control: public, max-age=31536000, immutable）を付けられる。
+    圧縮版は nginx の gzip_static / brotli_static でそのまま配信する。
+    brotli パッケージがない環境では gzip だけを作る。
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+
+        brotli = _brotli()
+        if brotli is None:
+            logger.warning("brotliがインストールされていないため、gzipの圧縮版だけを作成します")
+        for hashed_name in sorted(hashed_names | {self.manifest_name}):
+            if hashed_name.endswith(COMPRESS_EXTENSIONS) and self.exists(hashed_name):
+                self._write_compressed(hashed_name, brotli)
+
+    def _write_compressed(self, name, brotli):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < COMPRESS_MIN_SIZE:
+            return
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            # 小さくならない場合は元のファイルを配信させる
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
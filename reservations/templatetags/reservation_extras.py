@@ -4,3 +4,23 @@ register = template.Library()
 @register.filter
 def get_item(dictionary, key):
     return dictionary.get(key)
+
+@register.filter
+def tenant_client_data(tenant):
+    """カレンダーのスクリプトに渡すテナント情報（json_script で埋め込む）"""
+    return {
+        'slug': tenant.slug,
+        'name': tenant.name,
+        'startTime': tenant.start_time.strftime('%H:%M'),
+        'endTime': tenant.end_time.strftime('%H:%M'),
+        'slotDuration': tenant.slot_duration,
+        'openDays': {
+            'monday': tenant.monday_open,
+            'tuesday': tenant.tuesday_open,
+            'wednesday': tenant.wednesday_open,
+            'thursday': tenant.thursday_open,
+            'friday': tenant.friday_open,
+            'saturday': tenant.saturday_open,
+            'sunday': tenant.sunday_open,
+        },
+    }
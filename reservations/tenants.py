@@ -0,0 +1,103 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from .models import Tenant
+
+# プロセス内キャッシュの上限件数と有効期間（秒）
+TENANT_CACHE_SIZE = 256
+TENANT_CACHE_TTL = 300
+
+
+class TenantCache:
+    """slugをキーにしたLRU＋TTLのプロセス内テナントキャッシュ
+
+    各エントリは取得時点の共有バージョンを持ち、共有キャッシュ上のバージョンと
+    異なれば破棄する。これにより複数のワーカー間でも更新が反映される。
+    ただしバージョンは default キャッシュに置くため、default がプロセス内の
+    キャッシュ（locmemなど）だと他のワーカーの更新は TENANT_CACHE_TTL 秒経つまで
+    反映されない（本番では system check reservations.W002 が警告する）。
+    """
+
+    def __init__(self, maxsize=TENANT_CACHE_SIZE, ttl=TENANT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, slug, version):
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                return None
+            tenant, cached_version, expires_at = entry
+            if cached_version != version or expires_at < time.monotonic():
+                del self._entries[slug]
+                return None
+            self._entries.move_to_end(slug)
+            return tenant
+
+    def set(self, slug, version, tenant):
+        with self._lock:
+            self._entries[slug] = (tenant, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, slug):
+        with self._lock:
+            self._entries.pop(slug, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tenant_cache = TenantCache()
+
+
+def tenant_record_version_key(tenant_slug):
+    """テナント本体（とオーナー）の共有バージョンのキャッシュキー"""
+    return f"reservations:tenant-record-version:{tenant_slug}"
+
+def get_tenant_record_version(tenant_slug):
+    """共有バージョンを返す（未設定なら0）"""
+    return cache.get(tenant_record_version_key(tenant_slug), 0)
+
+def bump_tenant_record_version(tenant_slug):
+    """共有バージョンを進め、このプロセスのキャッシュも破棄する"""
+    if not tenant_slug:
+        return
+    key = tenant_record_version_key(tenant_slug)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, None)
+    tenant_cache.discard(tenant_slug)
+
+def schedule_tenant_record_bump(tenant_slug):
+    """トランザクションのコミット後に共有バージョンを進める"""
+    transaction.on_commit(lambda: bump_tenant_record_version(tenant_slug))
+
+def get_tenant_by_slug(tenant_slug):
+    """slugからテナント（オーナー付き）を取得。プロセス内キャッシュを優先する"""
+    version = get_tenant_record_version(tenant_slug)
+    tenant = tenant_cache.get(tenant_slug, version)
+    if tenant is None:
+        tenant = Tenant.objects.select_related('owner').filter(slug=tenant_slug).first()
+        if tenant is None:
+            raise Http404('テナントが見つかりません')
+        tenant_cache.set(tenant_slug, version, tenant)
+    # 呼び出し側での変更がキャッシュに残らないよう複製を返す
+    return copy.copy(tenant)
+
+def resolve_tenant(request, tenant_slug):
+    """リクエストごとに1回だけテナントを解決し、request.tenantに付与する"""
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None or tenant.slug != tenant_slug:
+        tenant = get_tenant_by_slug(tenant_slug)
+        request.tenant = tenant
+    return tenant
@@ -8,15 +8,18 @@ urlpatterns = [
     # 認証関連
     path('', views.login_view, name='login'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
+    path('api/tenants/search/', views.api_search_tenants, name='api_search_tenants'),
     
     # 顧客向け（認証不要）
     path('tenant/<slug:tenant_slug>/', views.calendar_view, name='calendar_by_tenant'),
     path('tenant/<slug:tenant_slug>/reserve/', views.reserve_slot, name='reserve_slot_by_tenant'),
+    path('tenant/<slug:tenant_slug>/csrf/', views.csrf_token_view, name='csrf_token_by_tenant'),
 
     
     # API エンドポイント（学習用）
     path('tenant/<slug:tenant_slug>/api/info/', views.api_tenant_info, name='api_tenant_info'),
     path('tenant/<slug:tenant_slug>/api/slots/', views.api_get_slots, name='api_get_slots'),
+    path('tenant/<slug:tenant_slug>/api/availability/', views.api_get_availability, name='api_get_availability'),
     
     # 開発者専用
     path('developer/', views.developer_dashboard, name='developer_dashboard'),
@@ -36,13 +39,17 @@ urlpatterns = [
     path('owner/tenant/<slug:tenant_slug>/menu/', views_menu_owner.owner_menu_list_by_tenant, name='owner_menu_list_by_tenant'),
     path('owner/tenant/<slug:tenant_slug>/email-settings/', views_owner.owner_email_settings, name='owner_email_settings'),
     path('owner/tenant/<slug:tenant_slug>/calendar/', views_owner.owner_calendar_view, name='owner_calendar_view'),
+    path('owner/tenant/<slug:tenant_slug>/export.csv', views_owner.owner_export_csv, name='owner_export_csv'),
     
     # オーナー向けAPI
     path('owner/tenant/<slug:tenant_slug>/api/slots/', views_owner.api_owner_slots, name='api_owner_slots'),
+    path('owner/tenant/<slug:tenant_slug>/api/reservations/', views_owner.api_reservation_list, name='api_reservation_list'),
     path('owner/tenant/<slug:tenant_slug>/api/reservation-counts/', views_owner.api_reservation_counts, name='api_reservation_counts'),
     path('owner/tenant/<slug:tenant_slug>/api/reservation/<int:reservation_id>/', views_owner.api_reservation_detail, name='api_reservation_detail'),
     path('owner/tenant/<slug:tenant_slug>/api/reservation/<int:reservation_id>/delete/', views_owner.api_delete_reservation, name='api_delete_reservation'),
     path('owner/tenant/<slug:tenant_slug>/api/reservation/create/', views_owner.api_create_reservation, name='api_create_reservation'),
+    path('owner/tenant/<slug:tenant_slug>/api/block/', views_owner.api_block_slots, name='api_block_slots'),
+    path('owner/tenant/<slug:tenant_slug>/api/reservation/import/', views_owner.api_import_reservations, name='api_import_reservations'),
     
     # 非推奨/削除予定（セキュリティ上問題のあるパターン）
     # path('calendar/', views.calendar_view, name='calendar'),  # tenant_slug不要のため削除
@@ -1,98 +1,106 @@
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage
 from django.conf import settings
 from django.template.loader import render_to_string
+from .email_templates import REMINDER_MESSAGE, REMINDER_SUBJECT, get_email_templates, template_values
 import logging
 
 logger = logging.getLogger(__name__)
 
-def send_reservation_confirmation_email(reservation):
-    """予約者に予約確認メールを送信"""
+def build_reservation_confirmation_email(reservation):
+    """予約者向けの予約確認メールを組み立てる（送信しない場合はNone）"""
     if not settings.ENABLE_RESERVATION_NOTIFICATIONS:
         logger.info("メール通知が無効になっています")
-        return False
-    
+        return None
+
     if not reservation.customer_email:
         logger.warning(f"予約ID {reservation.id}: 顧客のメールアドレスが設定されていません")
-        return False
-    
-    try:
-        tenant = reservation.tenant
-        
-        # 変数の置換
-        subject = tenant.customer_email_subject.format(
-            店舗名=tenant.name,
-            お客様名=reservation.customer_name,
-            予約日時=f"{reservation.date} {reservation.time_slot}",
-            電話番号=reservation.customer_phone,
-            メールアドレス=reservation.customer_email
-        )
-        
-        message = tenant.customer_email_message.format(
-            店舗名=tenant.name,
-            お客様名=reservation.customer_name,
-            予約日時=f"{reservation.date} {reservation.time_slot}",
-            電話番号=reservation.customer_phone,
-            メールアドレス=reservation.customer_email
-        )
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[reservation.customer_email],
-            fail_silently=False,
-        )
-        
-        logger.info(f"予約確認メールを送信しました: {reservation.customer_email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"予約確認メール送信エラー: {e}")
-        return False
+        return None
 
-def send_business_notification_email(reservation):
-    """事業者に予約通知メールを送信"""
+    templates = get_email_templates(reservation.tenant)
+    values = template_values(reservation)
+    subject = templates.customer_email_subject.render(values)
+    message = templates.customer_email_message.render(values)
+
+    return EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[reservation.customer_email],
+    )
+
+def build_business_notification_email(reservation):
+    """事業者向けの予約通知メールを組み立てる（送信しない場合はNone）"""
     if not settings.ENABLE_RESERVATION_NOTIFICATIONS:
         logger.info("メール通知が無効になっています")
-        return False
-    
+        return None
+
     tenant = reservation.tenant
     # 通知先メールアドレスを決定（設定されていればそれを、なければオーナーのメールアドレス）
     notification_email = tenant.notification_email or tenant.owner.email
-    
+
     if not notification_email:
         logger.warning(f"予約ID {reservation.id}: 事業者の通知先メールアドレスが設定されていません")
+        return None
+
+    templates = get_email_templates(tenant)
+    values = template_values(reservation, empty_email='-')
+    subject = templates.owner_email_subject.render(values)
+    message = templates.owner_email_message.render(values)
+
+    return EmailMessage(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[notification_email],
+    )
+
+def build_reminder_email(reservation):
+    """予約者向けの前日リマインドメールを組み立てる（送信しない場合はNone）"""
+    if not settings.ENABLE_RESERVATION_NOTIFICATIONS:
+        logger.info("メール通知が無効になっています")
+        return None
+
+    if not reservation.customer_email:
+        return None
+
+    values = template_values(reservation)
+    return EmailMessage(
+        subject=REMINDER_SUBJECT.render(values),
+        body=REMINDER_MESSAGE.render(values),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[reservation.customer_email],
+    )
+
+def send_reservation_confirmation_email(reservation):
+    """予約者に予約確認メールを送信（送る内容がなければFalse。送信エラーは例外のまま送出する）"""
+    email = build_reservation_confirmation_email(reservation)
+    if email is None:
         return False
-    
-    try:
-        # 変数の置換
-        subject = tenant.owner_email_subject.format(
-            店舗名=tenant.name,
-            お客様名=reservation.customer_name,
-            予約日時=f"{reservation.date} {reservation.time_slot}",
-            電話番号=reservation.customer_phone,
-            メールアドレス=reservation.customer_email or '-'
-        )
-        
-        message = tenant.owner_email_message.format(
-            店舗名=tenant.name,
-            お客様名=reservation.customer_name,
-            予約日時=f"{reservation.date} {reservation.time_slot}",
-            電話番号=reservation.customer_phone,
-            メールアドレス=reservation.customer_email or '-'
-        )
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[notification_email],
-            fail_silently=False,
-        )
-        
-        logger.info(f"事業者通知メールを送信しました: {notification_email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"事業者通知メール送信エラー: {e}")
+
+    from .mailer import get_sender
+    get_sender().send(email)
+
+    logger.info(f"予約確認メールを送信しました: {reservation.customer_email}")
+    return True
+
+def send_business_notification_email(reservation):
+    """事業者に予約通知メールを送信（送る内容がなければFalse。送信エラーは例外のまま送出する）"""
+    email = build_business_notification_email(reservation)
+    if email is None:
         return False
+
+    from .mailer import get_sender
+    get_sender().send(email)
+
+    logger.info(f"事業者通知メールを送信しました: {', '.join(email.to)}")
+    return True
+
+def send_reminder_email(reservation):
+    """予約者に前日リマインドメールを送信（送る内容がなければFalse。送信エラーは例外のまま送出する）"""
+    email = build_reminder_email(reservation)
+    if email is None:
+        return False
+
+    from .mailer import get_sender
+    get_sender().send(email)
+    return True
@@ -0,0 +1,91 @@
+import hashlib
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db import transaction
+
+# バージョンは default キャッシュに置く。ワーカー間で共有されるキャッシュ（Redis）でないと、
+# あるワーカーでの更新が他のワーカーのETag・ページキャッシュに伝わらず、古い内容の304や
+# キャッシュ済みページが返り続ける（本番では system check reservations.W002 が警告する）
+
+# テナントのバージョンの保持期間（秒）。消えても時刻ベースで再採番するため後退しない
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def tenant_version_key(tenant_slug):
+    """テナントのバージョンのキャッシュキー（ORMを使わずslugから引けるようにする）"""
+    return f"reservations:tenant-version:{tenant_slug}"
+
+# テナント一覧（ログイン画面の店舗一覧・検索）のバージョンのキャッシュキー
+DIRECTORY_VERSION_KEY = "reservations:tenant-directory-version"
+
+def _initial_version():
+    # キャッシュから消えた後も以前の値より大きくなるよう現在時刻（マイクロ秒）を使う
+    return time.time_ns() // 1000
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), VERSION_TIMEOUT)
+
+def get_tenant_version(tenant_slug):
+    """テナントの現在のバージョンを返す"""
+    return _get_version(tenant_version_key(tenant_slug))
+
+def bump_tenant_version(tenant_slug):
+    """テナントのバージョンを進める（Tenant・Menu・Reservationの書き込み時）
+
+    他のワーカーに伝わるのは default キャッシュが共有されている場合だけ。
+    """
+    if not tenant_slug:
+        return
+    _bump_version(tenant_version_key(tenant_slug))
+
+def get_directory_version():
+    """テナント一覧の現在のバージョンを返す"""
+    return _get_version(DIRECTORY_VERSION_KEY)
+
+def bump_directory_version():
+    """テナント一覧のバージョンを進める（テナントの作成・更新・削除時）"""
+    _bump_version(DIRECTORY_VERSION_KEY)
+
+def schedule_directory_bump():
+    """トランザクションのコミット後にテナント一覧のバージョンを進める"""
+    transaction.on_commit(bump_directory_version)
+
+def schedule_version_bump(tenant_slug):
+    """トランザクションのコミット後にテナントのバージョンを進める"""
+    transaction.on_commit(lambda: bump_tenant_version(tenant_slug))
+
+@lru_cache(maxsize=None)
+def get_release():
+    """デプロイごとに変わる値（settings.RELEASE と静的ファイルのマニフェストから作る）
+
+    テンプレートや応答の形が変わったデプロイの後に、古いETag・キャッシュ済みページが
+    使われ続けないようにする。プロセスの起動中は変わらないため一度だけ計算する。
+    """
+    parts = [getattr(settings, 'RELEASE', '')]
+    read_manifest = getattr(staticfiles_storage, 'read_manifest', None)
+    if read_manifest is not None:
+        parts.append(read_manifest() or '')
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:12]
+
+def make_tenant_etag(endpoint, tenant_slug, params, time_sensitive=False):
+    """エンドポイント・クエリ・テナントのバージョン・リリースから強いETagを作る"""
+    parts = [endpoint, tenant_slug, str(get_tenant_version(tenant_slug)), get_release()]
+    parts.extend(f"{key}={value}" for key, value in sorted(params.items()))
+    if time_sensitive:
+        # 予約可能時間（現在時刻基準）で結果が変わるため分単位で区切る
+        parts.append(str(int(time.time() // 60)))
+    digest = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
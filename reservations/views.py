@@ -1,27 +1,24 @@
-from django.conf import settings
-from twilio.rest import Client
-# TwilioでSMS送信
-def send_sms(to_number, message):
-    account_sid = settings.TWILIO_ACCOUNT_SID
-    auth_token = settings.TWILIO_AUTH_TOKEN
-    from_number = settings.TWILIO_FROM_NUMBER
-    client = Client(account_sid, auth_token)
-    try:
-        client.messages.create(
-            body=message,
-            from_=from_number,
-            to=to_number
-        )
-    except Exception as e:
-        print(f"SMS送信エラー: {e}")
 from django.contrib.auth import authenticate, login
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse, JsonResponse
-from django.views.decorators.csrf import csrf_exempt
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
 from datetime import datetime, date, timedelta
 from .models import Tenant, Menu, Reservation
-from .decorators import role_required
+from .decorators import role_required, tenant_etag, tenant_page_cache
+from .tenants import resolve_tenant
+from .notifications import enqueue_sms
+from .booking import SlotTaken, book_slot
+from .schedule import get_schedule, is_open_day
+from .dashboard import get_dashboard_page
+from .caching import DIRECTORY
+from .directory import MAX_SEARCH_LIMIT, SEARCH_LIMIT, directory_num_pages, directory_page, parse_page_number, search_tenants
+from .versioning import get_directory_version
+from .availability import MAX_RANGE_DAYS, get_day_availability, get_range_availability
 
 # CustomUserのimport（存在確認）
 try:
@@ -29,29 +26,12 @@ try:
 except ImportError:
     from django.contrib.auth.models import User as CustomUser
 
-def get_tenant_time_slots(tenant):
-    """テナント設定に基づく時間枠生成"""
-    slots = []
-    current = datetime.combine(date.today(), tenant.start_time)
-    end = datetime.combine(date.today(), tenant.end_time)
-    
-    while current.time() < end.time():
-        slots.append(current.time())
-        current += timedelta(minutes=tenant.slot_duration)
-    
-    return slots
-
-def is_open_day(day, tenant):
-    """営業日判定"""
-    weekday = day.weekday()
-    days = [tenant.monday_open, tenant.tuesday_open, tenant.wednesday_open,
-            tenant.thursday_open, tenant.friday_open, tenant.saturday_open, tenant.sunday_open]
-    return days[weekday]
-
+@tenant_etag('calendar')
+@tenant_page_cache('calendar')
 def calendar_view(request, tenant_slug=None):
     """顧客向けカレンダー表示（新しい月表示カレンダー）"""
     if tenant_slug:
-        tenant = get_object_or_404(Tenant, slug=tenant_slug)
+        tenant = resolve_tenant(request, tenant_slug)
     else:
         # tenant_slugがない場合はエラーページ
         return render(request, 'reservations/access_denied.html', {
@@ -63,6 +43,13 @@ def calendar_view(request, tenant_slug=None):
         'tenant': tenant
     })
 
+@ensure_csrf_cookie
+def csrf_token_view(request, tenant_slug):
+    """予約フォームのCSRFトークン（キャッシュしたカレンダーページにはトークンを含めない）"""
+    response = JsonResponse({'token': get_token(request)})
+    patch_cache_control(response, no_store=True, private=True)
+    return response
+
 # CSRFデコレータを削除し、適切なセキュリティを実装
 def reserve_slot(request, tenant_slug=None):
     """予約処理（セキュリティ強化版）"""
@@ -72,7 +59,7 @@ def reserve_slot(request, tenant_slug=None):
         return redirect('login')
     
     if tenant_slug:
-        tenant = get_object_or_404(Tenant, slug=tenant_slug)
+        tenant = resolve_tenant(request, tenant_slug)
     else:
         return redirect('login')
     
@@ -94,47 +81,48 @@ def reserve_slot(request, tenant_slug=None):
         reserve_date = datetime.strptime(date_str, '%Y-%m-%d').date()
         reserve_time = datetime.strptime(time_str, '%H:%M').time()
         
+        schedule = get_schedule(tenant)
+        
         # 営業日チェック
-        if not is_open_day(reserve_date, tenant):
+        if not schedule.is_open(reserve_date):
             raise ValueError("営業日ではありません")
         
         # 予約可能時間チェック
         now = datetime.now()
         slot_datetime = datetime.combine(reserve_date, reserve_time)
-        if slot_datetime < now + timedelta(hours=tenant.advance_hours):
+        if slot_datetime < now + timedelta(hours=schedule.advance_hours):
             raise ValueError("予約可能時間外です")
         
-        # 重複チェック
-        if not Reservation.objects.filter(tenant=tenant, date=reserve_date, time_slot=reserve_time).exists():
-            menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
-            reservation = Reservation.objects.create(
-                tenant=tenant,
-                menu=menu,
-                customer_name=customer_name[:100],  # 長さ制限
-                customer_email=customer_email,
-                customer_phone=customer_phone[:20],
-                date=reserve_date,
-                time_slot=reserve_time
-            )
-            
+        menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
+
+        def enqueue_notifications(reservation):
             # SMS通知（ブロック予約でない場合のみ）
             if customer_name != 'BLOCKED':
                 # 顧客へSMS通知
                 sms_msg = f"{tenant.name}のご予約が完了しました。\n日時: {reserve_date} {reserve_time.strftime('%H:%M')}\nお名前: {customer_name}"
-                send_sms(customer_phone, sms_msg)
+                enqueue_sms(reservation, customer_phone, sms_msg)
 
                 # 事業者へSMS通知（オーナーの電話番号があれば）
                 owner_phone = getattr(tenant.owner, 'phone', None)
                 if owner_phone:
                     owner_msg = f"新しい予約が入りました。\n日時: {reserve_date} {reserve_time.strftime('%H:%M')}\n顧客: {customer_name}"
-                    send_sms(owner_phone, owner_msg)
-        else:
-            raise ValueError("この時間は既に予約済みです")
+                    enqueue_sms(reservation, owner_phone, owner_msg)
+
+        # 予約と通知キューを同じトランザクションで保存（送信はコミット後）
+        # 重複は事前チェックせず一意制約で判定する
+        book_slot(
+            tenant, reserve_date, reserve_time,
+            on_booked=enqueue_notifications,
+            menu=menu,
+            customer_name=customer_name[:100],  # 長さ制限
+            customer_email=customer_email,
+            customer_phone=customer_phone[:20],
+        )
         
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({'status': 'success'})
             
-    except ValueError as e:
+    except (ValueError, SlotTaken) as e:
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return HttpResponse(str(e), status=400)
     except Exception as e:
@@ -146,18 +134,7 @@ def reserve_slot(request, tenant_slug=None):
 @role_required(['developer'])
 def developer_dashboard(request):
     """開発者用ダッシュボード"""
-    tenants = Tenant.objects.all().order_by('name')
-    try:
-        users = CustomUser.objects.all().order_by('-date_joined')[:10]
-    except Exception:
-        users = []
-    total_reservations = Reservation.objects.count()
-    
-    context = {
-        'tenants': tenants,
-        'users': users,
-        'total_reservations': total_reservations,
-    }
+    context = get_dashboard_page(request.GET.get('page'))
     return render(request, 'reservations/developer_dashboard.html', context)
 
 def login_view(request):
@@ -197,25 +174,45 @@ def login_view(request):
         else:
             error = "ユーザー名またはパスワードが正しくありません。"
     
-    # 顧客向けのテナント一覧を取得（全件表示）
-    tenants = Tenant.objects.all().order_by('name')
+    # 顧客向けの店舗一覧（テンプレートのキャッシュが切れたときだけ読み込む）
+    page_number = min(parse_page_number(request.GET.get('page')), directory_num_pages())
     
     return render(request, 'reservations/login.html', {
         'error': error,
-        'tenants': tenants
+        'directory': SimpleLazyObject(lambda: directory_page(page_number)),
+        'directory_version': get_directory_version(),
+        'directory_cache_timeout': DIRECTORY.timeout,
+        'page_number': page_number,
+    })
+
+def api_search_tenants(request):
+    """店舗名の前方一致検索（ログイン画面の店舗一覧から呼び出す）"""
+    limit = request.GET.get('limit', '')
+    limit = min(int(limit), MAX_SEARCH_LIMIT) if limit.isdigit() and int(limit) > 0 else SEARCH_LIMIT
+    tenants = search_tenants(request.GET.get('q', ''), limit)
+    return JsonResponse({
+        'tenants': [
+            {
+                'name': tenant['name'],
+                'slug': tenant['slug'],
+                'url': reverse('calendar_by_tenant', args=[tenant['slug']]),
+            }
+            for tenant in tenants
+        ],
     })
 
 # ===========================================
 # API エンドポイント（学習用）
 # ===========================================
 
+@tenant_etag('tenant_info')
 def api_tenant_info(request, tenant_slug):
     """
     最初のAPI: テナント情報を取得
     使い方: /tenant/reang/api/info/
     """
     # テナントを取得
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # テナント情報をJSON形式で返す
     tenant_data = {
@@ -237,6 +234,7 @@ def api_tenant_info(request, tenant_slug):
     
     return JsonResponse(tenant_data)
 
+@tenant_etag('slots', time_sensitive=True)
 def api_get_slots(request, tenant_slug):
     """
     ステップ2のAPI: 指定日の時間スロット取得
@@ -254,7 +252,7 @@ def api_get_slots(request, tenant_slug):
         return JsonResponse({'error': '日付の形式が正しくありません'}, status=400)
     
     # テナント情報を取得
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # 営業日チェック
     if not is_open_day(target_date, tenant):
@@ -263,37 +261,45 @@ def api_get_slots(request, tenant_slug):
             'message': 'この日は営業日ではありません'
         })
     
-    # 時間スロットを生成
-    slots = []
-    current_time = datetime.combine(target_date, tenant.start_time)
-    end_time = datetime.combine(target_date, tenant.end_time)
-    
-    while current_time < end_time:
-        time_str = current_time.strftime('%H:%M')
-        
-        # 既存の予約をチェック
-        is_reserved = Reservation.objects.filter(
-            tenant=tenant,
-            date=target_date,
-            time_slot=current_time.time()
-        ).exists()
-        
-        # 予約可能時間チェック（現在時刻から指定時間後以降）
-        now = timezone.now()
-        slot_datetime = timezone.make_aware(current_time)
-        is_available = slot_datetime >= now + timedelta(hours=tenant.advance_hours)
-        
-        slots.append({
-            'time': time_str,
-            'is_available': is_available and not is_reserved,
-            'is_reserved': is_reserved
-        })
-        
-        # 次の時間スロットに進む
-        current_time += timedelta(minutes=tenant.slot_duration)
+    # 時間スロットを生成（予約状況は1クエリで取得）
+    slots = get_day_availability(tenant, target_date)
     
     return JsonResponse({
         'slots': slots,
         'date': date_str,
         'tenant_name': tenant.name
-    })
\ No newline at end of file
+    })
+
+@tenant_etag('availability', time_sensitive=True)
+def api_get_availability(request, tenant_slug):
+    """
+    期間指定の空き状況取得API（カレンダー1か月分をまとめて取得）
+    使い方: /tenant/test/api/availability/?from=2025-10-01&to=2025-10-31
+    """
+    from_str = request.GET.get('from')
+    to_str = request.GET.get('to')
+    if not from_str or not to_str:
+        return JsonResponse({'error': '期間が指定されていません'}, status=400)
+    
+    try:
+        start_date = datetime.strptime(from_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(to_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': '日付の形式が正しくありません'}, status=400)
+    
+    if end_date < start_date:
+        return JsonResponse({'error': '終了日は開始日以降を指定してください'}, status=400)
+    if (end_date - start_date).days + 1 > MAX_RANGE_DAYS:
+        return JsonResponse({'error': f'期間は{MAX_RANGE_DAYS}日以内で指定してください'}, status=400)
+    
+    tenant = resolve_tenant(request, tenant_slug)
+    
+    # 期間内の予約は1回の範囲クエリで取得
+    days = get_range_availability(tenant, start_date, end_date)
+    
+    return JsonResponse({
+        'days': days,
+        'from': from_str,
+        'to': to_str,
+        'tenant_name': tenant.name
+    })
@@ -2,11 +2,12 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import Menu, Tenant
 from .decorators import tenant_owner_required
+from .tenants import resolve_tenant
 from .forms import MenuForm
 
 @tenant_owner_required
 def owner_menu_list_by_tenant(request, tenant_slug):
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # テナントオブジェクトが正しくcontextに渡されているか確認
     context = {
@@ -2,80 +2,74 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from datetime import datetime, timedelta, time, date
-from .models import Menu, Reservation, Tenant
+from .models import DailyReservationStat, Menu, Reservation, Tenant
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from .decorators import role_required, tenant_owner_required
-from .views import is_open_day
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from .decorators import role_required, tenant_etag, tenant_owner_required
+from .tenants import resolve_tenant
+from .notifications import enqueue_sms
+from .booking import SlotTaken, book_slot
+from .blocking import MAX_BLOCK_DAYS, block_slots, block_targets, unblock_slots
+from .exporting import export_queryset, iter_csv
+from .dashboard import get_dashboard_page
+from .week_grid import build_week_grid, week_start
+from .pagination import filter_reservations, paginate_reservations, parse_list_params
+from .importing import IMPORT_FORMATS, guess_format, import_reservations, read_rows
+from .schedule import is_open_day
+from .email_templates import validate_email_templates
+from .availability import RESERVATION_DETAIL_FIELDS, get_owner_day_slots, reservation_detail_payload
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from django.db import models
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_tenant_time_slots(tenant):
-    """テナント設定に基づく時間枠生成"""
-    slots = []
-    current = datetime.combine(date.today(), tenant.start_time)
-    end = datetime.combine(date.today(), tenant.end_time)
-    
-    while current.time() < end.time():
-        slots.append(current.time())
-        current += timedelta(minutes=tenant.slot_duration)
-    
-    return slots
-
-def is_open_day(day, tenant):
-    """営業日判定"""
-    weekday = day.weekday()
-    days = [tenant.monday_open, tenant.tuesday_open, tenant.wednesday_open,
-            tenant.thursday_open, tenant.friday_open, tenant.saturday_open, tenant.sunday_open]
-    return days[weekday]
+def reservation_list_context(request, tenant):
+    """予約一覧（絞り込み・キーセットページング）のテンプレート用コンテキスト"""
+    try:
+        params = parse_list_params(request.GET)
+        rows, next_cursor = paginate_reservations(
+            filter_reservations(tenant, **params['filters']).select_related('menu'),
+            cursor=params['cursor'],
+            page_size=params['page_size'],
+        )
+    except ValueError:
+        messages.error(request, '絞り込み条件が正しくありません。')
+        params = parse_list_params({})
+        rows, next_cursor = paginate_reservations(filter_reservations(tenant).select_related('menu'))
+    
+    # ページ移動のリンクは絞り込み条件を引き継ぐ
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    first_query = query.urlencode()
+    next_query = None
+    if next_cursor:
+        query['cursor'] = next_cursor
+        next_query = query.urlencode()
+    return {
+        'reservations': rows,
+        'list_filters': params['filters'],
+        'is_first_page': not params['cursor'],
+        'first_query': first_query,
+        'next_query': next_query,
+    }
 
 @role_required(['developer'])
 def developer_tenant_list(request):
     """開発者用テナント一覧"""
-    tenants = Tenant.objects.all().order_by('name')
-    context = {
-        'tenants': tenants,
-    }
+    context = get_dashboard_page(request.GET.get('page'))
     return render(request, 'reservations/developer_tenant_list.html', context)
 
 @tenant_owner_required
 def owner_reserve_list_by_tenant(request, tenant_slug):
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # 開発者またはテナントオーナーのみアクセス可能（decoratorで制御済み）
     week_offset = int(request.GET.get('week_offset', 0))
-    today = date.today()
-    start_of_week = today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
-    week_days = [start_of_week + timedelta(days=i) for i in range(7)]
-    
-    # テナント設定による時間枠
-    time_slots = get_tenant_time_slots(tenant)
-    
-    # 予約データ取得
-    reservations = Reservation.objects.filter(tenant=tenant, date__in=week_days)
-    res_dict = {f"{r.date}_{r.time_slot}": r for r in reservations}
-    
-    # カレンダーデータ構築
-    calendar_rows = []
-    for slot in time_slots:
-        row = []
-        for day in week_days:
-            key = f"{day}_{slot}"
-            reservation = res_dict.get(key)
-            is_open = is_open_day(day, tenant)
-            
-            row.append({
-                'day': day,
-                'slot': slot,
-                'reservation': reservation,
-                'is_open_day': is_open,
-                'key': f"{day}_{slot.strftime('%H-%M')}"
-            })
-        calendar_rows.append(row)
+    grid = build_week_grid(tenant, week_start(date.today(), week_offset))
+    week_days = list(grid.days)
+    time_slots = grid.slots
+    calendar_rows = grid.rows
     
     menus = Menu.objects.filter(tenant=tenant, is_active=True)
     
@@ -103,24 +97,19 @@ def owner_reserve_list_by_tenant(request, tenant_slug):
             if not is_open_day(reserve_date, tenant):
                 raise ValidationError('営業日ではありません。')
             
-            # 重複チェック
-            if Reservation.objects.filter(tenant=tenant, date=reserve_date, time_slot=reserve_time).exists():
-                raise ValidationError('この時間枠は既に予約済みです。')
-            
             menu = None
             if menu_id:
                 menu = Menu.objects.filter(id=menu_id, tenant=tenant, is_active=True).first()
                 if not menu:
                     raise ValidationError('選択されたメニューが見つかりません。')
             
-            Reservation.objects.create(
-                tenant=tenant,
+            # 重複は事前チェックせず一意制約で判定する
+            book_slot(
+                tenant, reserve_date, reserve_time,
                 menu=menu,
                 customer_name=customer_name,
                 customer_email=customer_email,
                 customer_phone=customer_phone,
-                date=reserve_date,
-                time_slot=reserve_time
             )
             
             messages.success(request, '予約を追加し、確認メールを送信しました。')
@@ -129,6 +118,10 @@ def owner_reserve_list_by_tenant(request, tenant_slug):
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
                 return JsonResponse({'status': 'success'})
                 
+        except SlotTaken:
+            messages.error(request, 'この時間枠は既に予約済みです。')
+            if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+                return JsonResponse({'status': 'error', 'message': 'この時間枠は既に予約済みです。'})
         except ValidationError as e:
             messages.error(request, str(e))
             if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -238,18 +231,16 @@ def owner_reserve_list_by_tenant(request, tenant_slug):
         
         return redirect('owner_calendar_view', tenant_slug=tenant.slug)
     
-    # 全予約一覧（最近の予約順）
-    all_reservations = Reservation.objects.filter(tenant=tenant).order_by('-date', '-time_slot')[:50]
-    
     context = {
         'tenant': tenant,
         'week_days': week_days,
         'time_slots': time_slots,
         'calendar_rows': calendar_rows,
         'menus': menus,
-        'reservations': all_reservations,
         'week_offset': week_offset,
     }
+    # 予約一覧（新しい順・キーセットページング）
+    context.update(reservation_list_context(request, tenant))
     return render(request, 'reservations/owner_reserve_list.html', context)
 
 @role_required(['owner', 'developer'])
@@ -269,24 +260,15 @@ def owner_reserve_calendar(request):
     
     # カレンダー表示範囲
     week_offset = int(request.GET.get('week_offset', 0))
-    today = datetime.today().date()
-    start_of_week = today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
-    week_days = [start_of_week + timedelta(days=i) for i in range(7)]
-    time_slots = [time(hour=h) for h in range(8, 21, 2)]
-    reservations = Reservation.objects.filter(tenant=tenant, date__in=week_days)
-    res_dict = {f"{r.date.strftime('%Y-%m-%d')}_{r.time_slot.strftime('%H:%M')}": r for r in reservations}
-    calendar_rows = []
-    for slot in time_slots:
-        row = []
-        for day in week_days:
-            key = f"{day.strftime('%Y-%m-%d')}_{slot.strftime('%H:%M')}"
-            reservation = res_dict.get(key)
-            row.append({'slot': slot, 'reservation': reservation, 'day': day})
-        calendar_rows.append(row)
+    # テナントの営業設定に沿った週グリッド
+    grid = build_week_grid(tenant, week_start(date.today(), week_offset))
+    week_days = list(grid.days)
+    time_slots = grid.slots
+    calendar_rows = grid.rows
     menus = Menu.objects.filter(tenant=tenant)
     # 予約追加
     if request.method == 'POST' and 'customer_name' in request.POST:
-        date = request.POST.get('date')
+        date_str = request.POST.get('date')
         time_slot = request.POST.get('time_slot')
         menu_id = request.POST.get('menu_id')
         customer_name = request.POST.get('customer_name')
@@ -295,24 +277,19 @@ def owner_reserve_calendar(request):
         
         try:
             slot_time = datetime.strptime(time_slot, '%H:%M').time()
-            exists = Reservation.objects.filter(tenant=tenant, date=date, time_slot=slot_time).exists()
+            menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
             
-            if not exists:
-                menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
-                
-                Reservation.objects.create(
-                    tenant=tenant,
-                    menu=menu,
-                    customer_name=customer_name,
-                    customer_email=customer_email,
-                    customer_phone=customer_phone,
-                    date=date,
-                    time_slot=slot_time
-                )
-                messages.success(request, '予約を追加しました。')
-            else:
-                messages.error(request, 'この時間枠は既に予約済みです。')
+            book_slot(
+                tenant, datetime.strptime(date_str, '%Y-%m-%d').date(), slot_time,
+                menu=menu,
+                customer_name=customer_name,
+                customer_email=customer_email,
+                customer_phone=customer_phone,
+            )
+            messages.success(request, '予約を追加しました。')
                 
+        except SlotTaken:
+            messages.error(request, 'この時間枠は既に予約済みです。')
         except Exception as e:
             logger.error(f"Error creating reservation: {str(e)}")
             messages.error(request, '予約の作成に失敗しました。')
@@ -325,6 +302,7 @@ def owner_reserve_calendar(request):
         'time_slots': time_slots,
         'calendar_rows': calendar_rows,
         'menus': menus,
+        'week_offset': week_offset,
     }
     return render(request, 'reservations/owner_reserve_calendar.html', context)
 
@@ -364,24 +342,15 @@ def owner_reserve_list(request):
     if not tenant:
         return render(request, 'reservations/owner_no_tenant.html')
     week_offset = int(request.GET.get('week_offset', 0))
-    today = datetime.today().date()
-    start_of_week = today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
-    week_days = [start_of_week + timedelta(days=i) for i in range(7)]
-    time_slots = [time(hour=h) for h in range(8, 21, 2)]
-    reservations = Reservation.objects.filter(tenant=tenant, date__in=week_days)
-    res_dict = {f"{r.date.strftime('%Y-%m-%d')}_{r.time_slot.strftime('%H:%M')}": r for r in reservations}
-    calendar_rows = []
-    for slot in time_slots:
-        row = []
-        for day in week_days:
-            key = f"{day.strftime('%Y-%m-%d')}_{slot.strftime('%H:%M')}"
-            reservation = res_dict.get(key)
-            row.append({'slot': slot, 'reservation': reservation, 'day': day})
-        calendar_rows.append(row)
+    # テナントの営業設定に沿った週グリッド
+    grid = build_week_grid(tenant, week_start(date.today(), week_offset))
+    week_days = list(grid.days)
+    time_slots = grid.slots
+    calendar_rows = grid.rows
     menus = Menu.objects.filter(tenant=tenant)
     # 予約追加
     if request.method == 'POST' and request.POST.get('action') == 'add':
-        date = request.POST.get('date')
+        date_str = request.POST.get('date')
         time_slot = request.POST.get('time_slot')
         menu_id = request.POST.get('menu_id')
         customer_name = request.POST.get('customer_name')
@@ -390,24 +359,19 @@ def owner_reserve_list(request):
         
         try:
             slot_time = datetime.strptime(time_slot, '%H:%M').time()
-            exists = Reservation.objects.filter(tenant=tenant, date=date, time_slot=slot_time).exists()
+            menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
             
-            if not exists:
-                menu = Menu.objects.filter(id=menu_id, tenant=tenant).first() if menu_id else None
-                
-                Reservation.objects.create(
-                    tenant=tenant,
-                    menu=menu,
-                    customer_name=customer_name,
-                    customer_email=customer_email,
-                    customer_phone=customer_phone,
-                    date=date,
-                    time_slot=slot_time
-                )
-                messages.success(request, '予約を追加しました。')
-            else:
-                messages.error(request, 'この時間枠は既に予約済みです。')
+            book_slot(
+                tenant, datetime.strptime(date_str, '%Y-%m-%d').date(), slot_time,
+                menu=menu,
+                customer_name=customer_name,
+                customer_email=customer_email,
+                customer_phone=customer_phone,
+            )
+            messages.success(request, '予約を追加しました。')
                 
+        except SlotTaken:
+            messages.error(request, 'この時間枠は既に予約済みです。')
         except Exception as e:
             logger.error(f"Error creating reservation: {str(e)}")
             messages.error(request, '予約の作成に失敗しました。')
@@ -421,22 +385,22 @@ def owner_reserve_list(request):
         if reservation:
             reservation.delete()
         return redirect('owner_reserve_list')
-    # 予約一覧（全期間）
-    all_reservations = Reservation.objects.filter(tenant=tenant).order_by('-date', '-time_slot')
     context = {
         'tenant': tenant,
         'week_days': week_days,
         'time_slots': time_slots,
         'calendar_rows': calendar_rows,
         'menus': menus,
-        'reservations': all_reservations,
+        'week_offset': week_offset,
     }
+    # 予約一覧（新しい順・キーセットページング）
+    context.update(reservation_list_context(request, tenant))
     return render(request, 'reservations/owner_reserve_list.html', context)
 
 @tenant_owner_required
 def owner_email_settings(request, tenant_slug):
     """メール設定画面"""
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     if request.method == 'POST':
         try:
@@ -456,12 +420,14 @@ def owner_email_settings(request, tenant_slug):
                 raise ValidationError('予約通知メール件名は必須です。')
             if not tenant.owner_email_message:
                 raise ValidationError('予約通知メール本文は必須です。')
+            # 差し込み項目の誤りは送信時ではなく保存時に知らせる
+            validate_email_templates(tenant)
             
             tenant.save()
             messages.success(request, 'メール設定を保存しました。')
             
         except ValidationError as e:
-            messages.error(request, str(e))
+            messages.error(request, ' '.join(e.messages))
         except Exception as e:
             logger.error(f"Error saving email settings: {str(e)}")
             messages.error(request, 'メール設定の保存に失敗しました。')
@@ -477,7 +443,7 @@ def owner_email_settings(request, tenant_slug):
 @tenant_owner_required
 def owner_calendar_view(request, tenant_slug):
     """オーナー向けカレンダー表示"""
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     return render(request, 'reservations/owner_calendar.html', {
         'tenant': tenant
@@ -486,7 +452,9 @@ def owner_calendar_view(request, tenant_slug):
 @role_required(['owner'])
 @tenant_owner_required
 def api_owner_slots(request, tenant_slug):
-    """オーナー向け時間スロット取得API（予約情報付き）"""
+    """オーナー向け時間スロット取得API（予約情報付き）
+    ?include=detail を付けると各予約の詳細も含めて返す
+    """
     date_str = request.GET.get('date')
     if not date_str:
         return JsonResponse({'error': '日付が指定されていません'}, status=400)
@@ -496,7 +464,7 @@ def api_owner_slots(request, tenant_slug):
     except ValueError:
         return JsonResponse({'error': '日付の形式が正しくありません'}, status=400)
     
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # 営業日チェック
     if not is_open_day(target_date, tenant):
@@ -505,30 +473,9 @@ def api_owner_slots(request, tenant_slug):
             'message': 'この日は営業日ではありません'
         })
     
-    # 時間スロットを生成
-    slots = []
-    current_time = datetime.combine(target_date, tenant.start_time)
-    end_time = datetime.combine(target_date, tenant.end_time)
-    
-    while current_time < end_time:
-        time_str = current_time.strftime('%H:%M')
-        
-        # 既存の予約をチェック
-        reservation = Reservation.objects.filter(
-            tenant=tenant,
-            date=target_date,
-            time_slot=current_time.time()
-        ).first()
-        
-        slots.append({
-            'time': time_str,
-            'is_available': reservation is None,
-            'is_reserved': reservation is not None,
-            'reservation_id': reservation.id if reservation else None,
-            'customer_name': reservation.customer_name if reservation else None
-        })
-        
-        current_time += timedelta(minutes=tenant.slot_duration)
+    # 時間スロットを生成（予約情報は1クエリでまとめて取得）
+    include_detail = request.GET.get('include') == 'detail'
+    slots = get_owner_day_slots(tenant, target_date, include_detail=include_detail)
     
     return JsonResponse({
         'slots': slots,
@@ -537,13 +484,14 @@ def api_owner_slots(request, tenant_slug):
     })
 
 @role_required(['owner'])
-@tenant_owner_required  
+@tenant_owner_required
+@tenant_etag('reservation_counts', private=True)
 def api_reservation_counts(request, tenant_slug):
     """月別予約件数取得API"""
     year = int(request.GET.get('year', datetime.now().year))
     month = int(request.GET.get('month', datetime.now().month))
     
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     
     # 指定月の予約を取得
     start_date = date(year, month, 1)
@@ -552,19 +500,28 @@ def api_reservation_counts(request, tenant_slug):
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
     
-    reservations = Reservation.objects.filter(
+    # 日別集計テーブルのみを参照（予約テーブルは集計しない）
+    stats = DailyReservationStat.objects.filter(
         tenant=tenant,
         date__range=[start_date, end_date]
-    ).values('date').annotate(count=models.Count('id'))
+    ).values_list('date', 'reservation_count', 'free_slot_count', 'occupancy_ratio')
     
     # 日付ごとの件数辞書を作成
     counts = {}
-    for res in reservations:
-        date_str = res['date'].strftime('%Y-%m-%d')
-        counts[date_str] = res['count']
+    day_stats = {}
+    for stat_date, count, free_count, occupancy in stats:
+        date_str = stat_date.strftime('%Y-%m-%d')
+        if count > 0:
+            counts[date_str] = count
+        day_stats[date_str] = {
+            'count': count,
+            'free': free_count,
+            'occupancy': round(occupancy, 3),
+        }
     
     return JsonResponse({
         'counts': counts,
+        'stats': day_stats,
         'year': year,
         'month': month
     })
@@ -573,20 +530,14 @@ def api_reservation_counts(request, tenant_slug):
 @tenant_owner_required
 def api_reservation_detail(request, tenant_slug, reservation_id):
     """予約詳細取得API"""
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
-    reservation = get_object_or_404(Reservation, id=reservation_id, tenant=tenant)
-    
-    return JsonResponse({
-        'id': reservation.id,
-        'customer_name': reservation.customer_name,
-        'customer_email': reservation.customer_email,
-        'customer_phone': reservation.customer_phone,
-        'date': reservation.date.strftime('%Y-%m-%d'),
-        'time_slot': reservation.time_slot.strftime('%H:%M'),
-        'menu_name': reservation.menu.name if reservation.menu else '未設定',
-        'menu_price': reservation.menu.price if reservation.menu else 0,
-        'created_at': reservation.created_at.strftime('%Y-%m-%d %H:%M')
-    })
+    tenant = resolve_tenant(request, tenant_slug)
+    reservation = Reservation.objects.filter(
+        id=reservation_id, tenant=tenant
+    ).values(*RESERVATION_DETAIL_FIELDS).first()
+    if reservation is None:
+        raise Http404('予約が見つかりません')
+    
+    return JsonResponse(reservation_detail_payload(reservation))
 
 @role_required(['owner'])
 @tenant_owner_required
@@ -595,7 +546,7 @@ def api_delete_reservation(request, tenant_slug, reservation_id):
     if request.method != 'DELETE':
         return JsonResponse({'error': 'DELETE メソッドが必要です'}, status=405)
     
-    tenant = get_object_or_404(Tenant, slug=tenant_slug)
+    tenant = resolve_tenant(request, tenant_slug)
     reservation = get_object_or_404(Reservation, id=reservation_id, tenant=tenant)
     
     # 予約を削除
@@ -619,7 +570,7 @@ def api_create_reservation(request, tenant_slug):
     
     try:
         data = json.loads(request.body)
-        tenant = get_object_or_404(Tenant, slug=tenant_slug)
+        tenant = resolve_tenant(request, tenant_slug)
         
         # バリデーション
         required_fields = ['date', 'time_slot', 'customer_name', 'customer_phone']
@@ -631,61 +582,39 @@ def api_create_reservation(request, tenant_slug):
         reservation_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
         reservation_time = datetime.strptime(data['time_slot'], '%H:%M').time()
         
-        # 重複チェック
-        existing = Reservation.objects.filter(
-            tenant=tenant,
-            date=reservation_date,
-            time_slot=reservation_time
-        ).exists()
-        
-        if existing:
-            return JsonResponse({'error': 'この時間は既に予約済みです'}, status=400)
-        
         # メニュー取得（オプション）
         menu = None
         if data.get('menu_id'):
             menu = Menu.objects.filter(id=data['menu_id'], tenant=tenant).first()
         
-        # 予約作成
-        reservation = Reservation.objects.create(
-            tenant=tenant,
-            menu=menu,
-            customer_name=data['customer_name'][:100],
-            customer_email=data.get('customer_email', ''),
-            customer_phone=data['customer_phone'][:20],
-            date=reservation_date,
-            time_slot=reservation_time
-        )
-        
         # メール送信処理（no_emailフラグでコントロール）
         send_email = data.get('no_email', 'false').lower() != 'true'
         is_block = data.get('is_block', 'false').lower() == 'true'
         
-        # デバッグログ
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Reservation created - Block: {is_block}, Send Email: {send_email}, Customer: {data.get('customer_name', 'N/A')}")
-        
-        if send_email and not is_block:
-            try:
-                # SMS送信処理（views.pyから正しくインポート）
-                from .views import send_sms
-                
+        def enqueue_notifications(reservation):
+            logger.info(f"Reservation created - Block: {is_block}, Send Email: {send_email}, Customer: {data.get('customer_name', 'N/A')}")
+            
+            if send_email and not is_block:
                 # 顧客へのSMS送信
                 if reservation.customer_phone:
                     customer_message = f"{tenant.name}のご予約が完了しました。\n日時: {reservation_date} {reservation_time.strftime('%H:%M')}\nお名前: {reservation.customer_name}"
-                    send_sms(reservation.customer_phone, customer_message)
+                    enqueue_sms(reservation, reservation.customer_phone, customer_message)
                 
                 # オーナーへのSMS送信
                 if tenant.owner.phone:
                     owner_message = f"新しい予約が入りました。\n日時: {reservation_date} {reservation_time.strftime('%H:%M')}\n顧客: {reservation.customer_name}"
-                    send_sms(tenant.owner.phone, owner_message)
-                    
-            except Exception as e:
-                # SMS送信失敗時のログ記録（予約作成は成功）
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"SMS sending failed for reservation {reservation.id}: {str(e)}")
+                    enqueue_sms(reservation, tenant.owner.phone, owner_message)
+        
+        # 予約作成（通知キューへの登録と同じトランザクション、送信はコミット後）
+        # 重複は事前チェックせず一意制約で判定する
+        reservation = book_slot(
+            tenant, reservation_date, reservation_time,
+            on_booked=enqueue_notifications,
+            menu=menu,
+            customer_name=data['customer_name'][:100],
+            customer_email=data.get('customer_email', ''),
+            customer_phone=data['customer_phone'][:20],
+        )
         
         # レスポンスメッセージを調整
         if is_block:
@@ -701,7 +630,160 @@ def api_create_reservation(request, tenant_slug):
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'JSONデータが不正です'}, status=400)
+    except SlotTaken as e:
+        return JsonResponse({'error': str(e)}, status=400)
     except ValueError as e:
         return JsonResponse({'error': str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({'error': '予約作成に失敗しました'}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': '予約作成に失敗しました'}, status=500)
+
+@role_required(['owner'])
+@tenant_owner_required
+def api_import_reservations(request, tenant_slug):
+    """予約の一括取り込みAPI（CSV / JSON Lines、通知は送らない）
+    列: date, time_slot, customer_name, customer_phone, customer_email, menu（メニュー名）
+    """
+    import io
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST メソッドが必要です'}, status=405)
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return JsonResponse({'error': 'ファイルが指定されていません'}, status=400)
+    
+    fmt = request.POST.get('format') or guess_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return JsonResponse({'error': 'CSV または JSON Lines（.jsonl）のファイルを指定してください'}, status=400)
+    
+    tenant = resolve_tenant(request, tenant_slug)
+    # アップロードを読み込みながら処理する（ファイル全体をメモリに展開しない）
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        result = import_reservations(tenant, read_rows(stream, fmt))
+    except UnicodeDecodeError:
+        return JsonResponse({'error': 'ファイルはUTF-8で保存してください'}, status=400)
+    
+    logger.info(f"Reservations imported for tenant {tenant.slug}: created={result.created}, errors={result.error_count}")
+    return JsonResponse(result.as_dict())
+
+@role_required(['owner'])
+@tenant_owner_required
+def api_block_slots(request, tenant_slug):
+    """期間ブロックAPI
+    {"action": "block" | "unblock", "start_date", "end_date", "start_time", "end_time", "weekdays": [0-6]}
+    時間帯（start_time〜end_time）と曜日（月曜=0）は省略可
+    """
+    import json
+    from django.db import IntegrityError
+    
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST メソッドが必要です'}, status=405)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSONデータが不正です'}, status=400)
+    
+    action = data.get('action', 'block')
+    if action not in ('block', 'unblock'):
+        return JsonResponse({'error': 'action は block または unblock を指定してください'}, status=400)
+    
+    try:
+        start_date = datetime.strptime(data.get('start_date', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(data.get('end_date') or data['start_date'], '%Y-%m-%d').date()
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': '日付の形式が正しくありません'}, status=400)
+    
+    if end_date < start_date:
+        return JsonResponse({'error': '終了日は開始日以降を指定してください'}, status=400)
+    if (end_date - start_date).days >= MAX_BLOCK_DAYS:
+        return JsonResponse({'error': f'期間は{MAX_BLOCK_DAYS}日以内で指定してください'}, status=400)
+    
+    try:
+        start_time = datetime.strptime(data['start_time'], '%H:%M').time() if data.get('start_time') else None
+        end_time = datetime.strptime(data['end_time'], '%H:%M').time() if data.get('end_time') else None
+    except (TypeError, ValueError):
+        return JsonResponse({'error': '時間の形式が正しくありません'}, status=400)
+    
+    weekdays = data.get('weekdays')
+    if weekdays is not None:
+        if not isinstance(weekdays, list) or not all(isinstance(day, int) and 0 <= day <= 6 for day in weekdays):
+            return JsonResponse({'error': '曜日は0（月曜）〜6（日曜）の配列で指定してください'}, status=400)
+        weekdays = set(weekdays)
+    
+    tenant = resolve_tenant(request, tenant_slug)
+    targets = block_targets(tenant, start_date, end_date, start_time, end_time, weekdays)
+    
+    if action == 'unblock':
+        unblocked = unblock_slots(tenant, targets)
+        logger.info(f"Slots unblocked for tenant {tenant.slug}: {unblocked}")
+        return JsonResponse({
+            'success': True,
+            'unblocked': unblocked,
+            'message': f'{unblocked}枠のブロックを解除しました',
+        })
+    
+    try:
+        blocked, skipped = block_slots(tenant, targets)
+    except IntegrityError:
+        return JsonResponse({'error': '予約が集中しているため、ブロックできませんでした。もう一度お試しください'}, status=409)
+    
+    logger.info(f"Slots blocked for tenant {tenant.slug}: {blocked} (skipped {skipped})")
+    return JsonResponse({
+        'success': True,
+        'blocked': blocked,
+        'skipped': skipped,
+        'message': f'{blocked}枠をブロックしました（予約済み {skipped}枠は除外）',
+    })
+
+@role_required(['owner', 'developer'])
+@tenant_owner_required
+def owner_export_csv(request, tenant_slug):
+    """予約のCSVエクスポート（?from=YYYY-MM-DD&to=YYYY-MM-DD&menu=ID&include_blocked=1）
+    件数が多くてもメモリを使わないよう、DBから読みながら1行ずつ送信する
+    """
+    tenant = resolve_tenant(request, tenant_slug)
+    
+    try:
+        start_date = datetime.strptime(request.GET['from'], '%Y-%m-%d').date() if request.GET.get('from') else None
+        end_date = datetime.strptime(request.GET['to'], '%Y-%m-%d').date() if request.GET.get('to') else None
+    except ValueError:
+        return JsonResponse({'error': '日付の形式が正しくありません'}, status=400)
+    
+    menu_id = request.GET.get('menu')
+    if menu_id and not menu_id.isdigit():
+        return JsonResponse({'error': 'メニューの指定が正しくありません'}, status=400)
+    
+    queryset = export_queryset(
+        tenant,
+        start_date=start_date,
+        end_date=end_date,
+        menu_id=menu_id,
+        include_blocked=request.GET.get('include_blocked') == '1',
+    )
+    response = StreamingHttpResponse(iter_csv(queryset), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{tenant.slug}-reservations.csv"'
+    return response
+
+@role_required(['owner', 'developer'])
+@tenant_owner_required
+def api_reservation_list(request, tenant_slug):
+    """予約一覧API（新しい順・キーセットページング）
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD&menu=ID&q=顧客名など&limit=件数&cursor=次ページのカーソル
+    """
+    tenant = resolve_tenant(request, tenant_slug)
+    try:
+        params = parse_list_params(request.GET)
+        rows, next_cursor = paginate_reservations(
+            filter_reservations(tenant, **params['filters']).values(*RESERVATION_DETAIL_FIELDS),
+            cursor=params['cursor'],
+            page_size=params['page_size'],
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'reservations': [reservation_detail_payload(row) for row in rows],
+        'next_cursor': next_cursor,
+    })
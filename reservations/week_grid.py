@@ -0,0 +1,55 @@
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import timedelta
+from .models import Reservation
+from .schedule import get_schedule
+
+# グリッドの1マス（reservation は values() の辞書、空き枠はNone）
+GridCell = namedtuple('GridCell', ['day', 'slot', 'reservation', 'is_open_day'])
+
+# グリッドに載せる予約の列
+GRID_FIELDS = ('id', 'customer_name')
+
+
+@dataclass(frozen=True)
+class WeekGrid:
+    """時間枠×日付の予約グリッド（行＝時間枠、列＝日付）"""
+    days: tuple
+    slots: tuple
+    rows: tuple
+
+    def cell(self, day_index, slot_index):
+        return self.rows[slot_index][day_index]
+
+
+def week_start(today, week_offset=0):
+    """today を含む週の月曜日（week_offset 週ずらす）"""
+    return today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
+
+def build_week_grid(tenant, start_date, days=7, fields=GRID_FIELDS):
+    """テナントのスケジュールに沿った予約グリッドを組み立てる
+
+    予約は必要な列だけを1クエリで取得し、(日付の番号, 時間枠の番号) で引く。
+    """
+    schedule = get_schedule(tenant)
+    day_list = tuple(start_date + timedelta(days=i) for i in range(days))
+    open_flags = tuple(schedule.is_open(day) for day in day_list)
+
+    fields = ['date', 'time_slot'] + [f for f in fields if f not in ('date', 'time_slot')]
+    reservations = {}
+    rows = Reservation.objects.filter(
+        tenant=tenant, date__range=(day_list[0], day_list[-1]),
+    ).values(*fields)
+    for row in rows:
+        slot_index = schedule.slot_index(row['time_slot'])
+        if slot_index is not None:
+            reservations[((row['date'] - start_date).days, slot_index)] = row
+
+    grid_rows = tuple(
+        tuple(
+            GridCell(day, slot, reservations.get((day_index, slot_index)), open_flags[day_index])
+            for day_index, day in enumerate(day_list)
+        )
+        for slot_index, slot in enumerate(schedule.slots)
+    )
+    return WeekGrid(days=day_list, slots=schedule.slots, rows=grid_rows)
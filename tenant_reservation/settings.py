@@ -127,6 +127,42 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic でハッシュ付きのファイル名とgzip・brotliの圧縮版を作る
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'reservations.storage.PrecompressedManifestStaticFilesStorage',
+    },
+}
+
+# デプロイごとに変える値（gitのコミットハッシュなど）。ETag・ページキャッシュのキーに含め、
+# テンプレートやAPIの応答が変わったデプロイの後に古い内容が返らないようにする
+# （静的ファイルのマニフェストの変更は自動で反映される）
+RELEASE = config('RELEASE', default='')
+
+# キャッシュ（CACHE_URL で切り替える）
+# テナントのバージョン・占有ビットマップなどをワーカー間で共有するため、本番
+# （DEBUG=False）では redis:// を指定する（それ以外は system check が警告する）
+#   redis://host:6379/0  Redis（サーバー間で共有。redisパッケージが必要）
+#   locmem://          プロセス内（既定。ワーカー間では共有されない。開発用）
+#   localredis://name  Redisの代わりにプロセス内で動かす（共有されない。開発・テスト用）
+#   file:///path/to    ファイル（同じサーバーのワーカー間で共有されるが、add()・incr() が
+#                      不可分でないため同時の再計算防止とバージョンの更新が競合する）
+CACHE_URL = config('CACHE_URL', default='locmem://')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('localredis://'):
+    CACHES = {'default': {'BACKEND': 'reservations.cache_backends.LocalRedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('file://'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_URL[len('file://'):] or str(BASE_DIR / 'cache'),
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'reservations'}}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -146,6 +182,14 @@ DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='info@reang.jp')
 
 # 予約通知設定
 ENABLE_RESERVATION_NOTIFICATIONS = config('ENABLE_RESERVATION_NOTIFICATIONS', default=True, cast=bool)
+# 通知キューの送信方法: thread（コミット後にバックグラウンドで送信）/ worker（run_notification_workerのみ）/ inline（同期送信）
+NOTIFICATION_DISPATCH = config('NOTIFICATION_DISPATCH', default='thread')
+# コミット後の送信に使うスレッド数の上限
+NOTIFICATION_THREADS = config('NOTIFICATION_THREADS', default=2, cast=int)
+
+# SMS送信バックエンド: reservations.sms.TwilioBackend / ConsoleBackend / LocmemBackend / FileBackend
+SMS_BACKEND = config('SMS_BACKEND', default='reservations.sms.TwilioBackend')
+SMS_FILE_PATH = config('SMS_FILE_PATH', default=str(BASE_DIR / 'sms.log'))
 
 # Twilio SMS settings（本番用は環境変数やSecret管理推奨）
 TWILIO_ACCOUNT_SID = 'your_account_sid_here'